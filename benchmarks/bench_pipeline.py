@@ -0,0 +1,347 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+# BENCHMARK PIPELINE SKALA SINTETIS
+# Semua jalur (ingestor cuaca, SQL & promo, silver, gold, compaction, dashboard)
+# dijalankan terhadap S3 stand-in lokal (moto_server, atau --endpoint ke MinIO
+# lokal), SQLite sebagai pengganti MySQL dan stand-in HTTP untuk API cuaca & promo. Per stage dicatat waktu, throughput, CPU,
+# peak RSS, jumlah request & byte S3, lalu disimpan sebagai JSON.
+#   python benchmarks/bench_pipeline.py --rows 1000000 --warungs 2000 --days 90
+#   python benchmarks/bench_pipeline.py --compare benchmarks/results/<lama>.json
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [
+    ROOT,
+    BENCH_DIR,
+    os.path.join(ROOT, "processor"),
+    os.path.join(ROOT, "ingestor"),
+    os.path.join(ROOT, "ingestor-sql"),
+    os.path.join(ROOT, "ingestor-promo"),
+]
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BUCKET = "sigma-lake"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline sintetis")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--warungs", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--weather-per-day", type=int, default=24)
+    parser.add_argument("--promo-offers", type=int, default=300)
+    parser.add_argument("--format", choices=["json", "parquet"], default="json")
+    parser.add_argument("--endpoint", help="S3 yang sudah jalan (default moto lokal)")
+    parser.add_argument("--skip-dashboard", action="store_true")
+    parser.add_argument("--out", help="file JSON hasil")
+    parser.add_argument("--compare", help="JSON hasil run sebelumnya")
+    return parser.parse_args()
+
+
+# S3 STAND-IN: moto_server di proses terpisah (CPU/RSS-nya tidak ikut terukur)
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_moto():
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    endpoint = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(endpoint, timeout=1)
+            return proc, endpoint
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("❌ moto_server tidak bisa dijalankan")
+
+
+def measure(results, counter, name, fn, rows):
+    from lake.metrics import RssSampler, rss_bytes
+
+    gc.collect()
+    req0, read0, written0 = counter.snapshot()
+    rss_start = rss_bytes()
+    cpu0 = time.process_time()
+    start = time.perf_counter()
+    error = None
+    with RssSampler() as sampler:
+        try:
+            fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+    req1, read1, written1 = counter.snapshot()
+
+    record = {
+        "stage": name,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds, 1) if seconds else None,
+        "cpu_seconds": round(time.process_time() - cpu0, 4),
+        "rss_start_mb": round(rss_start / 2**20, 1),
+        "peak_rss_mb": round(sampler.peak / 2**20, 1),
+        "s3_requests": req1 - req0,
+        "bytes_read": read1 - read0,
+        "bytes_written": written1 - written0,
+    }
+    if error:
+        record["error"] = error
+    results.append(record)
+    print(
+        f"{'❌' if error else '⏱️'} {name:<22} {seconds:9.3f} s | "
+        f"{record['rows_per_s'] or 0:>12,.0f} baris/s | "
+        f"peak {record['peak_rss_mb']:>8.1f} MB | {record['s3_requests']:>6} req | "
+        f"R {record['bytes_read'] / 2**20:8.2f} MB | "
+        f"W {record['bytes_written'] / 2**20:8.2f} MB"
+        + (f" | {error}" if error else "")
+    )
+    return record
+
+
+# SEED DATA SINTETIS
+def seed(s3, args, workdir, end):
+    import numpy as np
+    import sqlalchemy
+
+    import synthetic
+    from lake.latest import write_latest
+
+    rnd = np.random.default_rng(7)
+    started = time.perf_counter()
+
+    # MySQL stand-in: SQLite dengan tabel riwayat_makan
+    engine = sqlalchemy.create_engine(f"sqlite:///{workdir}/riwayat.db")
+    synthetic.riwayat_makan(args.rows, args.warungs, args.days, end).to_sql(
+        "riwayat_makan", engine, index=False, chunksize=50_000
+    )
+
+    master = synthetic.master_warung(args.warungs)
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="bronze/master/master_warung.csv",
+        Body=master.to_csv(index=False),
+    )
+
+    # Riwayat cuaca: bronze per jam + silver weather_cleaned yang sesuai
+    def put_weather(moment):
+        raw = synthetic.weather_raw(
+            moment, np.random.default_rng(int(moment.timestamp()))
+        )
+        ts = moment.strftime("%Y%m%d_%H%M")
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=f"bronze/weather/weather_raw_{ts}.json",
+            Body=synthetic.dumps(raw),
+        )
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=f"silver/weather_cleaned/weather_cleaned_{ts}.json",
+            Body=synthetic.dumps(synthetic.weather_cleaned(raw, moment)),
+        )
+        return ts
+
+    moments = list(synthetic.hourly(args.days, end, args.weather_per_day))
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        stamps = list(pool.map(put_weather, moments))
+    write_latest(
+        s3, BUCKET, "bronze/weather/", f"bronze/weather/weather_raw_{stamps[-1]}.json"
+    )
+
+    # Riwayat bronze promo (satu run per hari); run terbaru dibuat ingestor
+    for moment in synthetic.hourly(args.days, end, 1):
+        ts = moment.strftime("%Y%m%d_%H%M")
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=f"bronze/promo/promo_raw_{ts}.json",
+            Body=synthetic.dumps(synthetic.promo_raw(moment, args.promo_offers, rnd)),
+        )
+
+    # Halaman stand-in promo
+    pages = os.path.join(workdir, "pages")
+    os.makedirs(pages)
+    import standin
+
+    for name in standin.PLATFORMS:
+        with open(os.path.join(pages, f"{name}.html"), "w") as f:
+            f.write(synthetic.promo_page(args.promo_offers, rnd))
+
+    print(f"🌱 Seed selesai dalam {time.perf_counter() - started:.1f} s")
+    return engine, pages
+
+
+def compare(results, path):
+    with open(path) as f:
+        previous = {r["stage"]: r for r in json.load(f)["stages"]}
+    print(f"\n📊 Dibanding {path}")
+    for r in results:
+        old = previous.get(r["stage"])
+        if not old or not old.get("seconds") or not r.get("seconds"):
+            continue
+        print(
+            f"{r['stage']:<22} {old['seconds']:9.3f} -> {r['seconds']:9.3f} s "
+            f"({r['seconds'] / old['seconds']:.2f}x) | "
+            f"peak {old['peak_rss_mb']:.0f} -> {r['peak_rss_mb']:.0f} MB"
+        )
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="sigma-bench-")
+    moto = None
+    if args.endpoint:
+        endpoint = args.endpoint
+    else:
+        moto, endpoint = start_moto()
+        print(f"🧪 moto_server di {endpoint}")
+
+    # ENV sebelum modul repo di-import (konfigurasi dibaca saat import)
+    os.environ.update(
+        MINIO_ENDPOINT=endpoint,
+        MINIO_ACCESS_KEY=os.getenv("MINIO_ACCESS_KEY", "bench"),
+        MINIO_SECRET_KEY=os.getenv("MINIO_SECRET_KEY", "bench"),
+        AWS_DEFAULT_REGION=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+        LAKE_FORMAT=args.format,
+        LAKE_CACHE_DIR=os.path.join(workdir, "cache"),
+        DB_HOST="sqlite",
+        DB_USER="bench",
+        DB_PASSWORD="bench",
+        DB_NAME="bench",
+    )
+
+    # Hook di default session -> semua client boto3.client() (ingestor, processor,
+    # dashboard) ikut terhitung
+    import boto3
+
+    from lake.metrics import S3Counter
+
+    boto3.setup_default_session()
+    counter = S3Counter().attach(boto3.DEFAULT_SESSION.events)
+
+    import standin
+    from lake.s3 import make_client
+
+    s3 = make_client()
+    if not args.endpoint:
+        s3.create_bucket(Bucket=BUCKET)
+
+    import synthetic
+
+    end = synthetic.today_midnight()
+    engine, pages = seed(s3, args, workdir, end)
+
+    standin.FIXTURE_DIR = pages
+    server = ThreadingHTTPServer(("127.0.0.1", 0), standin.FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["PROMO_ROUTES"] = json.dumps(standin.routes(server.server_port))
+
+    import weather_standin
+
+    weather_server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), weather_standin.WeatherHandler
+    )
+    threading.Thread(target=weather_server.serve_forever, daemon=True).start()
+    os.environ["OPENWEATHER_URL"] = weather_standin.weather_url(
+        weather_server.server_port
+    )
+
+    import export_sql
+    import fetch_promo
+    import fetch_weather
+    from gold import decision_binding, recommendation_cube
+    from maintenance import compact
+    from silver import (
+        master_warung_cleaned,
+        promo_cleaned,
+        sql_cleaned,
+        weather_cleaned,
+    )
+
+    export_sql.engine = engine
+    promo_rows = args.promo_offers * len(standin.PLATFORMS)
+    weather_objects = args.days * args.weather_per_day
+
+    results = []
+    stages = [
+        ("ingestor_weather", fetch_weather.main, 1),
+        ("ingestor_sql", export_sql.main, args.rows),
+        ("ingestor_promo", fetch_promo.main, promo_rows),
+        ("silver_weather", lambda: weather_cleaned.main(s3), 1),
+        ("silver_sql", lambda: sql_cleaned.main(s3), args.rows),
+        ("silver_promo", lambda: promo_cleaned.main(s3), promo_rows),
+        ("silver_master", lambda: master_warung_cleaned.clean_master(s3), args.warungs),
+        ("gold_cold", lambda: decision_binding.main(s3), args.rows),
+        ("gold_incremental", lambda: decision_binding.main(s3), args.rows),
+        ("gold_cube", lambda: recommendation_cube.main(s3), args.warungs),
+        ("compaction", compact.main, weather_objects * 2),
+    ]
+    for name, fn, rows in stages:
+        measure(results, counter, name, fn, rows)
+
+    if not args.skip_dashboard:
+        try:
+            from streamlit.testing.v1 import AppTest
+        except ImportError:
+            print("⚠️ streamlit tidak ada, benchmark dashboard dilewati")
+        else:
+            app = AppTest.from_file(
+                os.path.join(ROOT, "dashboard.py"), default_timeout=900
+            )
+
+            def run_dashboard():
+                app.run()
+                if app.exception:
+                    raise RuntimeError(app.exception[0].message)
+
+            measure(results, counter, "dashboard_cold", run_dashboard, args.warungs)
+            measure(results, counter, "dashboard_warm", run_dashboard, args.warungs)
+
+    server.shutdown()
+    weather_server.shutdown()
+    if moto:
+        moto.terminate()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        "created_at": datetime.now().isoformat(),
+        "params": vars(args),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "stages": results,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"bench_pipeline_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"💾 Hasil disimpan di {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return output
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+# BENCHMARK CLEANING PROMO (silver)
+# Membandingkan implementasi lama (11x re.sub IGNORECASE per baris) dengan
+# lake.promo.clean_rows pada raw_text sintetis, sekaligus cek hasilnya identik.
+#   python benchmarks/bench_promo_clean.py [jumlah_baris]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lake.promo import NOISE_PATTERNS, PROMO_KEYWORDS, clean_rows  # noqa: E402
+
+VALID_PLATFORMS = {"GoJek", "Grab", "Shopee"}
+
+WORDS = (
+    "Food makan Diskon hemat, voucher GoFood grabfood! cashback GRATIS ongkir "
+    "Promo off kopi nasi ayam s/d Rp 50rb rp10.000 minimal order pengguna baru "
+    "30% close slot"
+).split()
+NOISE = [
+    "Lihat Detail",
+    "Syarat & Ketentuan",
+    "arrow-forwardios",
+    "Arrow forward",
+    "Diverifikasi",
+    "Lihat Kode Promo",
+    "Offer Verified",
+    "LOS",
+    "losyarat",
+    "llihat detailos",
+]
+# Sebagian kecil non-ASCII supaya jalur IGNORECASE penuh ikut teruji
+UNICODE = ["Café", "hemat–banget", "ſyarat", "KETENTUAN™", "İkan"]
+
+
+# IMPLEMENTASI LAMA (baseline)
+def legacy_clean_text(text):
+    cleaned = text
+    for pattern in NOISE_PATTERNS:
+        cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"[^\w\s%]", " ", cleaned)
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = re.sub(r"\brp\b", "RP", cleaned, flags=re.IGNORECASE)
+    return cleaned
+
+
+def legacy_clean_rows(rows, platforms):
+    cleaned_rows = []
+    for row in rows:
+        platform = row.get("platform")
+        raw_text = row.get("raw_text", "")
+        if platform not in platforms:
+            continue
+        cleaned = legacy_clean_text(raw_text)
+        text_lower = cleaned.lower()
+        if "food" not in text_lower:
+            continue
+        if not any(k in text_lower for k in PROMO_KEYWORDS):
+            continue
+        if len(cleaned) < 20 or len(cleaned) > 600:
+            continue
+        cleaned_rows.append(
+            {
+                "platform": platform,
+                "judul_promo": cleaned,
+                "kata_kunci": [k for k in PROMO_KEYWORDS if k in text_lower],
+                "tanggal_scrape": row.get("scrape_date"),
+                "waktu_scrape": row.get("scrape_time"),
+                "source_url": row.get("source_url"),
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+    return cleaned_rows
+
+
+def synthetic_rows(n, seed=42):
+    rnd = random.Random(seed)
+    platforms = ["GoJek", "Grab", "Shopee", "Tokopedia"]
+    rows = []
+    for _ in range(n):
+        words = rnd.choices(WORDS, k=rnd.randint(3, 30))
+        if rnd.random() < 0.5:
+            words.insert(rnd.randrange(len(words) + 1), rnd.choice(NOISE))
+        if rnd.random() < 0.05:
+            words.insert(rnd.randrange(len(words) + 1), rnd.choice(UNICODE))
+        rows.append(
+            {
+                "platform": rnd.choice(platforms),
+                "raw_text": " ".join(words),
+                "scrape_date": "2025-12-15",
+                "scrape_time": "12:00:00",
+                "source_url": "http://bench",
+            }
+        )
+    return rows
+
+
+def strip_timestamp(rows):
+    return [{k: v for k, v in r.items() if k != "timestamp"} for r in rows]
+
+
+def run(name, fn, rows):
+    start = time.perf_counter()
+    result = fn(rows, VALID_PLATFORMS)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<10} | {len(result):>8,} baris silver | {elapsed:7.2f} s | "
+        f"{len(rows) / elapsed:>10,.0f} baris/s"
+    )
+    return result, elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = synthetic_rows(n)
+    print(f"📄 {n:,} raw_text sintetis")
+
+    old, old_s = run("lama", legacy_clean_rows, rows)
+    new, new_s = run("compiled", clean_rows, rows)
+
+    identical = strip_timestamp(old) == strip_timestamp(new)
+    print(f"⚡ {old_s / new_s:.1f}x lebih cepat, output identik: {identical}")
+    if not identical:
+        raise SystemExit("❌ Output silver berbeda dari implementasi lama")
+
+
+if __name__ == "__main__":
+    main()
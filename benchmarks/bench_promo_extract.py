@@ -0,0 +1,80 @@
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+# BENCHMARK EKSTRAKSI PROMO
+# Membandingkan mode "all" vs "leaf" x parser html.parser vs lxml pada halaman
+# sintetis bersarang: ukuran JSON bronze yang dihasilkan + waktu parse.
+#   python benchmarks/bench_promo_extract.py [jumlah_offer] [kedalaman]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "ingestor-promo")]
+
+from fetch_promo import build_items, scrape_raw  # noqa: E402
+
+WORDS = ["diskon", "voucher", "cashback", "gratis", "ongkir", "food", "hemat", "rp"]
+
+
+def synthetic_page(offers, depth, seed=42):
+    rnd = random.Random(seed)
+    cards = []
+    for i in range(offers):
+        title = (
+            " ".join(rnd.choice(WORDS) for _ in range(8)) + f" {rnd.randint(5, 70)}%"
+        )
+        card = (
+            f'<article class="offer"><div class="title">{title} #{i}</div>'
+            f'<div class="meta"><span>Berlaku s/d {rnd.randint(1, 28)} Des</span></div>'
+            f'<a href="#">Lihat kode promo</a></article>'
+        )
+        cards.append(card)
+    body = "".join(cards)
+    for level in range(depth):
+        body = f'<div class="wrap-{level}">{body}</div>'
+    return f"<html><body>{body}</body></html>"
+
+
+def run(html, mode, parser, dedupe=True, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = scrape_raw(html, mode=mode, parser=parser, dedupe=dedupe)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    items = build_items("GoJek", "http://bench", texts, datetime(2025, 12, 15, 12))
+    size = len(json.dumps({"data": items}, ensure_ascii=False).encode("utf-8"))
+    return {
+        "mode": mode if dedupe else f"{mode} (tanpa dedup)",
+        "parser": parser,
+        "rows": len(texts),
+        "bytes": size,
+        "seconds": best,
+    }
+
+
+def main():
+    offers = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    html = synthetic_page(offers, depth)
+    print(f"📄 Halaman sintetis: {offers} offer, kedalaman {depth}, {len(html):,} byte")
+
+    # Baseline = perilaku lama: semua elemen, html.parser, tanpa dedup
+    results = [run(html, "all", "html.parser", dedupe=False)] + [
+        run(html, mode, parser)
+        for mode in ["all", "leaf"]
+        for parser in ["html.parser", "lxml"]
+    ]
+    baseline = results[0]
+    for r in results:
+        print(
+            f"{r['mode']:<18} | {r['parser']:<11} | {r['rows']:>6} baris | "
+            f"{r['bytes']:>10,} byte ({r['bytes'] / baseline['bytes']:.1%}) | "
+            f"{r['seconds'] * 1000:8.1f} ms ({baseline['seconds'] / r['seconds']:.1f}x)"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
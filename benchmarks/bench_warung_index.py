@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import time
+from datetime import time as jam
+
+import numpy as np
+
+# BENCHMARK FILTER MASTER WARUNG: scan mask pandas vs WarungIndex
+#   python benchmarks/bench_warung_index.py --warungs 100000 1000000
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.dirname(os.path.abspath(__file__))]
+
+import synthetic  # noqa: E402
+from lake.warung_index import WarungIndex  # noqa: E402
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index master warung")
+    parser.add_argument("--warungs", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for n in args.warungs:
+        master = synthetic.master_warung(n)
+        for col in ["indoor", "pedas"]:
+            master[col] = master[col] == "TRUE"
+
+        start = time.perf_counter()
+        index = WarungIndex(master)
+        build = time.perf_counter() - start
+
+        def scan():
+            mask = (master["jarak_menit"] <= 10) & (master["harga_rata2"] <= 25000)
+            mask &= master["indoor"].astype(bool)
+            mask &= master["porsi"].isin(["Besar", "Sedang"])
+            return master[mask].reset_index(drop=True)
+
+        def indexed():
+            return index.take(
+                index.candidates(
+                    max_jarak=10,
+                    max_harga=25000,
+                    indoor=True,
+                    porsi=["Besar", "Sedang"],
+                )
+            )
+
+        scan_ms, expected = timed(scan, args.repeat)
+        index_ms, got = timed(indexed, args.repeat)
+        assert np.array_equal(expected["id_warung"], got["id_warung"])
+        hours_ms, _ = timed(
+            lambda: index.candidates(max_jarak=10, open_at=jam(21, 30)), args.repeat
+        )
+        print(
+            f"🔎 {n:>9,} warung | build {build:6.2f} s | scan {scan_ms:7.2f} ms | "
+            f"index {index_ms:7.2f} ms | +jam buka {hours_ms:7.2f} ms | "
+            f"{len(got):,} kandidat"
+        )
+
+
+if __name__ == "__main__":
+    main()
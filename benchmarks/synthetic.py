@@ -0,0 +1,155 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# GENERATOR DATA SINTETIS (skema sama dengan mysql-init.sql & master_warung.csv)
+KATEGORI = ["Nasi", "Mie", "Gorengan", "Minuman", "Soto", "Bakso"]
+MENU = ["Nasi ayam geprek", "Mie goreng", "Soto banjar", "Bakso urat", "Nasi kuning"]
+METODE = ["dine-in", "takeaway", "Dine In", " takeaway "]
+PORSI = ["Kecil", "Sedang", "Besar"]
+KONDISI = ["Rain", "Clear", "Clouds", "Drizzle", "Thunderstorm"]
+PLATFORMS = ["GoJek", "Grab", "Shopee"]
+PROMO_WORDS = [
+    "Diskon",
+    "food",
+    "GoFood",
+    "GrabFood",
+    "voucher",
+    "cashback",
+    "gratis",
+    "ongkir",
+    "hemat",
+    "Rp",
+    "20rb",
+    "30%",
+    "pengguna",
+    "baru",
+]
+NOISE = ["Lihat detail", "Syarat & ketentuan", "arrow-forward", "Diverifikasi"]
+
+
+def warung_name(i):
+    return f"Warung Sintetis {i:05d}"
+
+
+def master_warung(n, seed=42):
+    rnd = np.random.default_rng(seed)
+    buka = rnd.integers(6, 12, n)
+    return pd.DataFrame(
+        {
+            "id_warung": np.arange(1, n + 1),
+            "nama_warung": [warung_name(i) for i in range(1, n + 1)],
+            "jenis_makanan": rnd.choice(MENU, n),
+            "kategori": rnd.choice(KATEGORI, n),
+            "harga_rata2": rnd.integers(8, 60, n) * 1000,
+            "jarak_menit": rnd.integers(1, 30, n),
+            "indoor": rnd.choice(["TRUE", "FALSE"], n),
+            "pedas": rnd.choice(["TRUE", "FALSE"], n),
+            "jam_buka": [f"{h:02d}:00" for h in buka],
+            "jam_tutup": [f"{h:02d}:00" for h in rnd.integers(17, 24, n)],
+            "rating_rasa": rnd.uniform(3.0, 5.0, n).round(1),
+            "porsi": rnd.choice(PORSI, n),
+            "waktu_saji": rnd.integers(3, 30, n),
+        }
+    )
+
+
+# riwayat_makan: n baris tersebar di `days` hari terakhir sebelum `end`
+def riwayat_makan(n, warungs, days, end, seed=42):
+    rnd = np.random.default_rng(seed)
+    offsets = np.sort(rnd.integers(0, days * 86400, n))
+    start = pd.Timestamp(end) - pd.Timedelta(days=days)
+    moments = start + pd.to_timedelta(offsets, unit="s")
+    ids = rnd.integers(1, warungs + 1, n)
+    return pd.DataFrame(
+        {
+            "id_makan": np.arange(1, n + 1),
+            "tanggal": moments.strftime("%Y-%m-%d"),
+            "waktu": moments.strftime("%H:%M:%S"),
+            "id_warung": ids,
+            "nama_warung": [warung_name(i) for i in ids],
+            "menu": rnd.choice(MENU, n),
+            "kategori": rnd.choice(KATEGORI, n),
+            "harga": rnd.integers(8, 60, n) * 1000,
+            "metode": rnd.choice(METODE, n),
+            "kepuasan": rnd.integers(1, 6, n),
+        }
+    )
+
+
+# Respon OpenWeather (bronze) per jam
+def weather_raw(moment, rnd):
+    return {
+        "name": "Banjarmasin",
+        "dt": int(moment.timestamp()),
+        "weather": [{"main": str(rnd.choice(KONDISI)), "description": "synthetic"}],
+        "main": {
+            "temp": round(float(rnd.uniform(24, 34)), 1),
+            "humidity": int(rnd.integers(55, 98)),
+        },
+    }
+
+
+# Silver weather_cleaned yang sesuai dengan weather_raw di atas
+def weather_cleaned(raw, moment):
+    return {
+        "kota": raw["name"],
+        "kondisi": raw["weather"][0]["main"],
+        "deskripsi": raw["weather"][0]["description"],
+        "suhu": float(raw["main"]["temp"]),
+        "kelembapan": int(raw["main"]["humidity"]),
+        "timestamp": moment.isoformat(),
+    }
+
+
+def hourly(days, end, per_day=24):
+    step = timedelta(hours=24 / per_day)
+    moment = end - timedelta(days=days)
+    while moment < end:
+        yield moment
+        moment += step
+
+
+def promo_text(rnd):
+    words = list(rnd.choice(PROMO_WORDS, int(rnd.integers(6, 16))))
+    if rnd.random() < 0.5:
+        words.insert(int(rnd.integers(0, len(words) + 1)), str(rnd.choice(NOISE)))
+    return " ".join(words)
+
+
+# Bronze promo satu run (format sama dengan fetch_promo.py)
+def promo_raw(moment, per_run, rnd):
+    return {
+        "ingest_time": moment.isoformat(),
+        "source": "Cuponation",
+        "data": [
+            {
+                "platform": str(rnd.choice(PLATFORMS)),
+                "raw_text": promo_text(rnd),
+                "scrape_date": moment.date().isoformat(),
+                "scrape_time": moment.strftime("%H:%M:%S"),
+                "source_url": "http://synthetic",
+            }
+            for _ in range(per_run)
+        ],
+    }
+
+
+# Halaman HTML untuk stand-in promo (ingestor-promo/standin.py)
+def promo_page(offers, rnd):
+    cards = "".join(
+        f'<article class="offer"><div class="offer-title">{promo_text(rnd)} #{i}</div>'
+        f'<a href="#">Lihat kode promo</a></article>'
+        for i in range(offers)
+    )
+    return f'<html><body><div class="offer-list">{cards}</div></body></html>'
+
+
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def today_midnight():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
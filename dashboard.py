@@ -3,11 +3,32 @@ import pandas as pd
 import boto3
 import json
 import os
-import io
 from datetime import datetime
 from sklearn.tree import DecisionTreeClassifier
 from dotenv import load_dotenv
 
+from lake.diskcache import get_cache
+from lake.features import (
+    FEATURES_PREFIX,
+    SERVING_FEATURES,
+    TARGET,
+    is_takeaway,
+    lunch_flag,
+)
+from lake.formats import file_type_of, parse_body
+from lake.framecache import FrameCache
+from lake.latest import read_latest, resolve_latest, resolve_latest_keys
+from lake.models import is_compatible, latest_model_meta, load_model
+from lake.recommendation import (
+    CUBE_PREFIX,
+    mode_tags,
+    prob_column,
+    score_column,
+    score_warungs,
+)
+from lake.warung_index import WarungIndex
+from lake.weather import current_weather
+
 load_dotenv()
 st.set_page_config(page_title="SPK Cerdas: Makan Siang", layout="wide")
 
@@ -26,76 +47,175 @@ def get_s3_client():
     )
 
 
-@st.cache_data
+# Kolom yang dipakai dashboard (parquet cuma baca kolom ini)
+FEATURE_COLUMNS = SERVING_FEATURES + [TARGET]
+# Fallback gold lama (sebelum ada gold/features/): is_takeaway dari metode
+GOLD_COLUMNS = FEATURE_COLUMNS + ["metode"]
+PROMO_COLUMNS = ["platform"]
+
+
+# Data dicek ulang ke MinIO paling cepat tiap DATA_CHECK_SECONDS
+DATA_CHECK_SECONDS = int(os.getenv("DATA_CHECK_SECONDS", "60"))
+
+
+# Hasil parse per objek, dipakai ulang selama ETag-nya tidak berubah
+@st.cache_resource
+def get_frame_cache():
+    return FrameCache()
+
+
+def with_takeaway(df):
+    if "is_takeaway" not in df.columns:
+        df["is_takeaway"] = is_takeaway(df["metode"]) if "metode" in df.columns else 0
+    return df
+
+
+# cache_resource: frame & index dipakai bersama antar rerun (tidak di-copy/pickle
+# per interaksi), jadi jangan diubah in-place
+@st.cache_resource(ttl=DATA_CHECK_SECONDS)
 def load_data():
     s3 = get_s3_client()
     bucket = "sigma-lake"
+    cache = get_frame_cache()
+
+    # Tabel fitur gold (sudah dihitung decision_binding)
+    latest_gold = resolve_latest(s3, bucket, FEATURES_PREFIX)
+    if latest_gold:
+        df_train = cache.get(
+            s3,
+            bucket,
+            latest_gold,
+            lambda body: parse_body(
+                body, file_type_of(latest_gold, "csv"), FEATURE_COLUMNS
+            ),
+        )
+    else:
+        latest_gold = resolve_latest(s3, bucket, "gold/decision_binding/")
+        if not latest_gold:
+            return None, None, None, None, None
+        df_train = cache.get(
+            s3,
+            bucket,
+            latest_gold,
+            lambda body: with_takeaway(
+                parse_body(body, file_type_of(latest_gold, "csv"), GOLD_COLUMNS)
+            ),
+        )
 
-    # Gold Data
-    objs = s3.list_objects_v2(Bucket=bucket, Prefix="gold/decision_binding/").get(
-        "Contents", []
+    # Master Warung, langsung di-index (dibangun ulang hanya kalau ETag berubah)
+    master_key = "silver/master/warung_cleaned.json"
+    master_warung = cache.get(
+        s3,
+        bucket,
+        master_key,
+        lambda body: WarungIndex(pd.DataFrame(json.loads(body))),
     )
-    if not objs:
-        return None, None, None
-    latest_gold = sorted(objs, key=lambda x: x["LastModified"], reverse=True)[0]["Key"]
-    obj_gold = s3.get_object(Bucket=bucket, Key=latest_gold)
-    df_train = pd.read_csv(io.BytesIO(obj_gold["Body"].read()))
-
-    # Master Warung
-    obj_master = s3.get_object(Bucket=bucket, Key="silver/master/warung_cleaned.json")
-    master_warung = pd.DataFrame(json.loads(obj_master["Body"].read()))
-
-    # Promo
-    objs_promo = s3.list_objects_v2(Bucket=bucket, Prefix="silver/promo_cleaned/").get(
-        "Contents", []
+
+    # Promo (run terbaru, bisa beberapa partisi kalau parquet)
+    promo_keys = resolve_latest_keys(s3, bucket, "silver/promo_cleaned/")
+    promo_frames = [
+        cache.get(
+            s3,
+            bucket,
+            key,
+            lambda body, key=key: parse_body(body, file_type_of(key), PROMO_COLUMNS),
+        )
+        for key in promo_keys
+    ]
+    df_promo = (
+        pd.concat(promo_frames, ignore_index=True) if promo_frames else pd.DataFrame()
     )
-    df_promo = pd.DataFrame()
-    if objs_promo:
-        latest_promo = sorted(
-            objs_promo, key=lambda x: x["LastModified"], reverse=True
-        )[0]["Key"]
-        obj_p = s3.get_object(Bucket=bucket, Key=latest_promo)
-        promo_data = json.loads(obj_p["Body"].read())
-        df_promo = pd.DataFrame(promo_data["data"])
 
-    return df_train, master_warung, df_promo
+    # Cube rekomendasi gold, hanya kalau dibuat dari tabel fitur yang sama
+    cube, cube_meta = None, read_latest(s3, bucket, CUBE_PREFIX)
+    if cube_meta and cube_meta.get("features_key") == latest_gold:
+        cube_key = cube_meta["key"]
+        cube = cache.get(
+            s3,
+            bucket,
+            cube_key,
+            lambda body: WarungIndex(parse_body(body, file_type_of(cube_key, "csv"))),
+        )
+
+    cache.retain(
+        [latest_gold, master_key]
+        + promo_keys
+        + ([cube_meta["key"]] if cube is not None else [])
+    )
+    return df_train, master_warung, df_promo, cube, cube_meta
 
 
 try:
-    df_train, df_warung, df_promo = load_data()
+    df_train, warung_index, df_promo, cube, cube_meta = load_data()
     if df_train is None:
         st.stop()
 except:
     st.stop()
 
-# 2. TRAINING MODEL
-if "metode" in df_train.columns:
-    df_train["is_takeaway"] = df_train["metode"].apply(
-        lambda x: 1 if str(x).lower() == "takeaway" else 0
-    )
-else:
-    df_train["is_takeaway"] = 0
 
-features = ["harga", "is_hujan", "suhu", "ada_promo", "is_lunch_time", "is_takeaway"]
-target = "kepuasan"
-df_clean = df_train.dropna(subset=features + [target])
-model = DecisionTreeClassifier(max_depth=5, random_state=42)
-model.fit(df_clean[features], df_clean[target])
+# Cuaca sekarang, dicek ulang paling cepat tiap DATA_CHECK_SECONDS
+@st.cache_data(ttl=DATA_CHECK_SECONDS)
+def get_current_weather():
+    return current_weather(get_s3_client(), "sigma-lake")
+
+
+# 2. MODEL (registry gold/models, dilatih sekali per run pipeline)
+features = SERVING_FEATURES
+target = TARGET
+
+# Pointer model dicek ulang paling cepat tiap MODEL_CHECK_SECONDS
+MODEL_CHECK_SECONDS = int(os.getenv("MODEL_CHECK_SECONDS", "60"))
+
+
+@st.cache_data(ttl=MODEL_CHECK_SECONDS)
+def get_model_meta():
+    return latest_model_meta(get_s3_client(), "sigma-lake", "spk_tree")
+
+
+# Objek model di-cache per ETag: hanya di-download ulang kalau modelnya berubah
+@st.cache_resource
+def get_model(model_key, model_etag):
+    return load_model(get_s3_client(), "sigma-lake", model_key)
+
+
+# FALLBACK: registry kosong / tidak kompatibel -> latih lokal (sekali per data)
+@st.cache_resource
+def train_local_model(df_train):
+    df_clean = df_train.dropna(subset=features + [target])
+    model = DecisionTreeClassifier(max_depth=5, random_state=42)
+    model.fit(df_clean[features], df_clean[target])
+    return model
+
+
+model_meta = get_model_meta()
+if is_compatible(model_meta, features):
+    model = get_model(model_meta["model_key"], model_meta["model_etag"])
+else:
+    model = train_local_model(df_train)
 
 # 3. SIDEBAR & PREFERENSI USER
 st.title("🍽️ SPK Next-Gen: Makan Apa?")
 
-# Context
-latest_context = df_train.iloc[-1]
-is_hujan_now = latest_context["is_hujan"]
-suhu_now = latest_context["suhu"]
+# Context: cuaca dari observasi terbaru (bukan transaksi terakhir di tabel fitur)
+is_hujan_now, suhu_now = get_current_weather()
 jam_sekarang = st.sidebar.time_input("Jam Sekarang", datetime.now().time())
-is_lunch_now = 1 if 11 <= jam_sekarang.hour <= 14 else 0
+is_lunch_now = lunch_flag(jam_sekarang)
 
 st.sidebar.metric(
     "Cuaca", "Hujan 🌧️" if is_hujan_now else "Cerah ☀️", f"{suhu_now:.1f}°C"
 )
 
+cache_stats = get_frame_cache().stats()
+st.sidebar.caption(
+    f"🗄️ Cache data: {cache_stats['hits']} hit / {cache_stats['misses']} miss "
+    f"({cache_stats['objects']} objek)"
+)
+if get_cache() is not None:
+    disk_stats = get_cache().stats()
+    st.sidebar.caption(
+        f"💾 Cache disk: {disk_stats['hits']} hit / {disk_stats['stored']} disimpan"
+    )
+
 st.sidebar.header("🎯 Mode Prioritas")
 mode_pilihan = st.sidebar.radio(
     "Lagi pengen apa?",
@@ -108,6 +228,7 @@ mode_pilihan = st.sidebar.radio(
 )
 
 st.sidebar.header("Filter & Preferensi")
+hanya_buka = st.sidebar.checkbox("Hanya warung yang buka di jam ini", value=False)
 
 # --- LOGIKA UI SIDEBAR DINAMIS ---
 max_budget = 999999999  # Default Infinity
@@ -138,102 +259,87 @@ else:  # Mode Seimbang
 
 
 # 4. DECISION LOGIC (SCENARIO BASED)
-results = []
 active_platforms = df_promo["platform"].unique().tolist() if not df_promo.empty else []
 promo_avail = 1 if active_platforms else 0
 
-for idx, row in df_warung.iterrows():
-    # --- 4.1 Filter Mutlak (Hard Constraints) ---
-    # Cuaca
-    if is_hujan_now and not row["indoor"]:
-        continue
+# Cube gold dipakai kalau dibuat dari model, suhu & kondisi promo yang sama:
+# skor tinggal dibaca per kolom, tanpa prediksi model per interaksi
+use_cube = (
+    cube is not None
+    and is_compatible(model_meta, features)
+    and cube_meta.get("model_key") == model_meta["model_key"]
+    and cube_meta.get("suhu") == suhu_now
+    and cube_meta.get("ada_promo") == promo_avail
+)
+if use_cube:
+    warung_index = cube
 
+# --- 4.1 Filter Mutlak (Hard Constraints), lewat index master warung ---
+posisi = warung_index.candidates(
     # Jarak
-    if row["jarak_menit"] > max_jarak:
-        continue
-
+    max_jarak=max_jarak,
     # Filter Budget (Hanya untuk Mode Seimbang & Kepepet)
-    if (
-        mode_pilihan in ["Seimbang (AI)", "Kepepet (Cepat)"]
-        and row["harga_rata2"] > max_budget
-    ):
-        continue
-
+    max_harga=(
+        max_budget if mode_pilihan in ["Seimbang (AI)", "Kepepet (Cepat)"] else None
+    ),
+    # Cuaca
+    indoor=True if is_hujan_now else None,
     # Filter Porsi (Khusus Sultan)
-    if mode_pilihan == "Sultan (Sepuasnya)" and filter_porsi:
-        if row["porsi"] not in filter_porsi:
-            continue
-
-    # --- 4.2 PREDIKSI AI (Base Score) ---
-    input_base = pd.DataFrame(
-        [[row["harga_rata2"], is_hujan_now, suhu_now, promo_avail, is_lunch_now, 0]],
-        columns=features,
+    porsi=(
+        filter_porsi if mode_pilihan == "Sultan (Sepuasnya)" and filter_porsi else None
+    ),
+    # Jam buka warung (jam_buka/jam_tutup)
+    open_at=jam_sekarang if hanya_buka else None,
+)
+kandidat = warung_index.take(posisi)
+harga = kandidat["harga_rata2"]
+rasa = kandidat["rating_rasa"]
+waktu = kandidat["waktu_saji"]
+
+# --- 4.2 PREDIKSI AI & SKOR SKENARIO (lake/recommendation.py) ---
+# Tanpa cube: dihitung live, hanya untuk konteks sekarang (dine-in & takeaway)
+if use_cube:
+    scored = kandidat
+else:
+    scored = score_warungs(
+        model,
+        kandidat,
+        suhu_now,
+        promo_avail,
+        contexts=[(is_hujan_now, is_lunch_now, 0), (is_hujan_now, is_lunch_now, 1)],
+        modes=[mode_pilihan],
     )
+final_score = scored[score_column(mode_pilihan, is_hujan_now, is_lunch_now, 0)]
 
-    prob_kepuasan = (
-        model.predict_proba(input_base)[0][1] if len(model.classes_) > 1 else 1.0
-    )
+# --- 4.3 LABEL UI ---
+tags = [[] for _ in range(len(kandidat))]
+
+
+def add_tag(kondisi, tag):
+    for i in kondisi[kondisi].index:
+        tags[i].append(tag)
 
-    # --- 4.3 SKORING BERBASIS SKENARIO (Weighted Scoring) ---
-    final_score = prob_kepuasan * 100  # Skala 0-100
-    tags = []  # Untuk label di UI
-
-    # A. LOGIKA SULTAN (Rasa + Porsi)
-    if mode_pilihan == "Sultan (Sepuasnya)":
-        # Fokus Rasa & Kualitas
-        score_rasa = (row["rating_rasa"] / 5.0) * 60  # Bobot rasa dominan (60%)
-        final_score = (prob_kepuasan * 40) + score_rasa
-
-        # Bonus Sultan
-        if row["rating_rasa"] >= 4.7:
-            final_score += 15
-            tags.append("TOP TIER ⭐")
-
-    # B. LOGIKA TANGGAL TUA (Harga + Porsi)
-    elif mode_pilihan == "Tanggal Tua (Hemat)":
-        # Algoritma Pencari Murah: Semakin murah, skor makin tinggi
-        # Misal harga 10rb dapet poin penuh, harga 50rb poin 0
-        price_sensitivity = max(0, 50000 - row["harga_rata2"]) / 500
-        final_score = (prob_kepuasan * 30) + price_sensitivity  # AI cuma 30%, Harga 70%
-
-        if row["harga_rata2"] <= 15000:
-            tags.append("HEMAT")
-
-        if row["porsi"] in ["Besar", "Jumbo"] and row["harga_rata2"] <= 18000:
-            final_score += 20
-            tags.append("KENYANG MAX")
-
-    # C. LOGIKA KEPEPET (Waktu + Jarak)
-    elif mode_pilihan == "Kepepet (Cepat)":
-        # Prioritas Waktu Saji
-        if row["waktu_saji"] <= 5:
-            final_score += 40
-            tags.append("KILAT ⚡")
-        elif row["waktu_saji"] <= 10:
-            final_score += 20
-
-        # Penalty Waktu Lama
-        if row["waktu_saji"] > 15:
-            final_score -= 50
-
-    results.append(
-        {
-            "data": row,
-            "Nama": row["nama_warung"],
-            "Harga": row["harga_rata2"],
-            "Skor": final_score,
-            "Rasa": row["rating_rasa"],
-            "Porsi": row["porsi"],
-            "Waktu": row["waktu_saji"],
-            "Tags": tags,
-        }
-    )
+
+for tag, kondisi in mode_tags(mode_pilihan, kandidat):
+    add_tag(kondisi, tag)
+
+results = pd.DataFrame(
+    {
+        "Nama": kandidat["nama_warung"],
+        "Harga": harga,
+        "Skor": final_score,
+        "Rasa": rasa,
+        "Porsi": kandidat["porsi"],
+        "Waktu": waktu,
+        "Jarak": kandidat["jarak_menit"],
+        "Tags": tags,
+    }
+)
 
 # 5. TAMPILAN PRESCRIPTIVE
-if results:
-    df_res = pd.DataFrame(results).sort_values("Skor", ascending=False)
+if not results.empty:
+    df_res = results.sort_values("Skor", ascending=False)
     best = df_res.iloc[0]
-    best_data = best["data"]
 
     # UI Header
     st.success(f"🏆 REKOMENDASI: {mode_pilihan.upper()}")
@@ -249,7 +355,7 @@ if results:
 
     with c2:
         st.metric("Estimasi Waktu", f"{best['Waktu']} menit", "Penyajian")
-        st.metric("Jarak", f"{best_data['jarak_menit']} menit", "Perjalanan")
+        st.metric("Jarak", f"{best['Jarak']} menit", "Perjalanan")
 
     with c3:
         st.info("💡 **ANALISIS PRESCRIPTIVE**")
@@ -264,7 +370,7 @@ if results:
                 st.write("✅ Kualitas rasa terjamin.")
 
         elif mode_pilihan == "Kepepet (Cepat)":
-            total_waktu = best["Waktu"] + best_data["jarak_menit"]
+            total_waktu = best["Waktu"] + best["Jarak"]
             st.write(f"⏱️ **Total Waktu: {total_waktu} menit**")
             if total_waktu <= 15:
                 st.write("✅ Aman! Masih keburu sebelum aktivitas selanjutnya.")
@@ -278,17 +384,8 @@ if results:
                 st.write("✅ Value for Money Tinggi! Murah + Banyak.")
 
         # 2. Saran Metode & Promo (Cross-Check)
-        input_tk = pd.DataFrame(
-            [[best["Harga"], is_hujan_now, suhu_now, promo_avail, is_lunch_now, 1]],
-            columns=features,
-        )
-        input_di = pd.DataFrame(
-            [[best["Harga"], is_hujan_now, suhu_now, promo_avail, is_lunch_now, 0]],
-            columns=features,
-        )
-
-        prob_tk = model.predict_proba(input_tk)[0][1]
-        prob_di = model.predict_proba(input_di)[0][1]
+        prob_tk = scored.at[best.name, prob_column(is_hujan_now, is_lunch_now, 1)]
+        prob_di = scored.at[best.name, prob_column(is_hujan_now, is_lunch_now, 0)]
 
         if prob_tk > prob_di or mode_pilihan == "Kepepet (Cepat)":
             st.write("🥡 **Saran:** Lebih baik **Takeaway**.")
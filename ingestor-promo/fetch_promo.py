@@ -1,11 +1,20 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, CData, NavigableString
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlsplit
+import hashlib
 import json
 import os
+import threading
 import boto3
 from dotenv import load_dotenv
 
+from lake.latest import write_latest
+from lake.metrics import add_rows, track
+from lake.state import STATE_PREFIX, load_state, save_state
+
 # LOAD ENV
 load_dotenv()
 
@@ -16,8 +25,30 @@ ROUTES = [
     {"platform": "Shopee", "url": "https://www.cuponation.co.id/shopee-kode-promo"},
 ]
 
+# PROMO_ROUTES (JSON) untuk mengarahkan scraper ke server lain, mis. stand-in lokal
+if os.getenv("PROMO_ROUTES"):
+    ROUTES = json.loads(os.getenv("PROMO_ROUTES"))
+
+# Ekstraksi: "all" (default, sama dengan perilaku lama) atau "leaf" (bronze lebih
+# kecil); parser: "html.parser" atau "lxml" (lebih cepat)
+PROMO_EXTRACT_MODE = os.getenv("PROMO_EXTRACT_MODE", "all")
+PROMO_PARSER = os.getenv("PROMO_PARSER", "html.parser")
+CANDIDATE_TAGS = ["article", "div", "a"]
+
+# Mode leaf: container yang teks totalnya <= batas ini dianggap satu kartu promo
+# dan teks lengkapnya ikut diambil (judul & nama platform sering ada di elemen
+# bersaudara). Di atas batas = wrapper halaman, teksnya tidak diulang.
+PROMO_CARD_MAX_CHARS = int(os.getenv("PROMO_CARD_MAX_CHARS", "1000"))
+
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
+# Semua route di-fetch bareng, tapi maksimal PER_HOST_LIMIT request per host
+MAX_WORKERS = int(os.getenv("PROMO_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.getenv("PROMO_PER_HOST", "2"))
+
+# ETag / Last-Modified + raw_text terakhir per route
+STATE_KEY = f"{STATE_PREFIX}fetch_promo/routes.json"
+
 # MINIO CLIENT
 s3 = boto3.client(
     "s3",
@@ -28,47 +59,183 @@ s3 = boto3.client(
 
 BUCKET = "sigma-lake"
 
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def host_limit(url):
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_limits[host]
+
+
+# SESSION BERSAMA: koneksi keep-alive dipakai ulang antar route
+def make_session():
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 # SCRAPE RAW
-def scrape_raw(platform, url):
-    response = requests.get(url, headers=HEADERS, timeout=15)
-    soup = BeautifulSoup(response.text, "html.parser")
+# mode "all" : teks setiap article/div/a (lama; container bersarang mengulang teks)
+# mode "leaf": tiap potong teks hanya milik elemen kandidat terdalam yang memuatnya,
+#              ditambah teks lengkap container kecil (kartu promo)
+def scrape_raw(html, mode=None, parser=None, dedupe=True):
+    soup = BeautifulSoup(html, parser or PROMO_PARSER)
+    if (mode or PROMO_EXTRACT_MODE) == "leaf":
+        raw_texts = leaf_texts(soup)
+    else:
+        raw_texts = []
+        for el in soup.find_all(CANDIDATE_TAGS):
+            text = el.get_text(separator=" ", strip=True)
+            if not text:
+                continue
+            raw_texts.append(text)
+
+    return dedupe_texts(raw_texts) if dedupe else raw_texts
 
-    raw_items = []
-    now = datetime.now()
 
-    for el in soup.find_all(["article", "div", "a"]):
-        text = el.get_text(separator=" ", strip=True)
+def leaf_texts(soup, card_max_chars=None):
+    card_max_chars = card_max_chars or PROMO_CARD_MAX_CHARS
+    own_texts = {}
+    # Container = kandidat yang memuat kandidat lain bertekst; panjang teks
+    # totalnya dijumlah dari bawah (tanpa get_text per wrapper)
+    container_chars = {}
+    for string in soup.find_all(string=True):
+        # Sama dengan get_text(): komentar, script & style tidak ikut
+        if type(string) not in (NavigableString, CData):
+            continue
+        text = string.strip()
         if not text:
             continue
+        owner = None
+        for parent in string.parents:
+            if parent.name not in CANDIDATE_TAGS:
+                continue
+            if owner is None:
+                owner = parent
+            else:
+                container_chars[id(parent)] = (
+                    container_chars.get(id(parent), 0) + len(text) + 1
+                )
+        if owner is None:
+            continue
+        own_texts.setdefault(id(owner), []).append(text)
+
+    # Urutan dokumen: kartu dulu, lalu teks miliknya sendiri
+    raw_texts = []
+    for el in soup.find_all(CANDIDATE_TAGS):
+        if container_chars.get(id(el), card_max_chars + 1) <= card_max_chars:
+            raw_texts.append(el.get_text(separator=" ", strip=True))
+        if id(el) in own_texts:
+            raw_texts.append(" ".join(own_texts[id(el)]))
+    return raw_texts
+
+
+# DEDUP: hash teks ternormalisasi (lowercase, spasi dirapikan), urutan pertama dipakai
+def dedupe_texts(raw_texts):
+    seen = set()
+    unique = []
+    for text in raw_texts:
+        normalized = " ".join(text.lower().split())
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        unique.append(text)
+    return unique
+
+
+def build_items(platform, url, raw_texts, now):
+    return [
+        {
+            "platform": platform,
+            "raw_text": text,
+            "scrape_date": now.date().isoformat(),
+            "scrape_time": now.strftime("%H:%M:%S"),
+            "source_url": url,
+        }
+        for text in raw_texts
+    ]
+
+
+# FETCH 1 ROUTE: GET kondisional, 304 -> tidak di-parse, pakai raw_text terakhir
+def fetch_route(session, route, cached):
+    url = route["url"]
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    with host_limit(url):
+        response = session.get(url, headers=headers, timeout=15)
+
+    if response.status_code == 304 and "raw_texts" in cached:
+        return dict(cached, changed=False)
+
+    response.raise_for_status()
+    return {
+        "changed": True,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "raw_texts": scrape_raw(response.text),
+    }
 
-        raw_items.append(
-            {
-                "platform": platform,
-                "raw_text": text,
-                "scrape_date": now.date().isoformat(),
-                "scrape_time": now.strftime("%H:%M:%S"),
-                "source_url": url,
-            }
-        )
 
-    return raw_items
+def fetch_all(routes, state):
+    session = make_session()
+
+    def run(route):
+        cached = state.get("routes", {}).get(route["url"], {})
+        try:
+            return fetch_route(session, route, cached)
+        except requests.RequestException as e:
+            # Route gagal: pakai hasil terakhir (kalau ada), state tidak diubah
+            print(f"⚠️ Gagal fetch {route['url']}: {e}")
+            return dict(cached, changed=False, failed=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(routes)))) as pool:
+        return list(pool.map(run, routes))
 
 
 # MAIN
 def main():
-    all_raw = []
+    state = load_state(s3, BUCKET, STATE_KEY)
+    results = fetch_all(ROUTES, state)
 
-    for route in ROUTES:
-        all_raw.extend(scrape_raw(route["platform"], route["url"]))
+    changed = [r["platform"] for r, res in zip(ROUTES, results) if res["changed"]]
+    if not changed:
+        print("⏭️ Semua halaman promo tidak berubah (304), skip parse & upload")
+        return
+
+    now = datetime.now()
+    all_raw = []
+    routes_state = dict(state.get("routes", {}))
+    for route, res in zip(ROUTES, results):
+        all_raw.extend(
+            build_items(route["platform"], route["url"], res.get("raw_texts", []), now)
+        )
+        if not res.get("failed"):
+            routes_state[route["url"]] = {
+                "etag": res.get("etag"),
+                "last_modified": res.get("last_modified"),
+                "raw_texts": res.get("raw_texts", []),
+            }
 
     output = {
-        "ingest_time": datetime.now().isoformat(),
+        "ingest_time": now.isoformat(),
         "source": "Cuponation",
+        "changed_routes": changed,
         "data": all_raw,
     }
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    timestamp = now.strftime("%Y%m%d_%H%M")
     key = f"bronze/promo/promo_raw_{timestamp}.json"
 
     s3.put_object(
@@ -77,9 +244,15 @@ def main():
         Body=json.dumps(output, ensure_ascii=False),
         ContentType="application/json",
     )
+    write_latest(s3, BUCKET, "bronze/promo/", key, rows=len(all_raw))
+
+    # Validator baru disimpan SETELAH upload sukses
+    save_state(s3, BUCKET, STATE_KEY, {"routes": routes_state})
+    add_rows(sum(len(r.get("raw_texts", [])) for r in results), len(all_raw))
 
-    print(f"✅ RAW promo data saved to {key}")
+    print(f"✅ RAW promo data saved to {key} (berubah: {', '.join(changed)})")
 
 
 if __name__ == "__main__":
-    main()
+    with track(s3, BUCKET, "fetch_promo"):
+        main()
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import sys
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# STAND-IN CUPONATION LOKAL
+# Menyajikan fixtures/<nama>.html di /<nama> lengkap dengan ETag & Last-Modified,
+# dan membalas 304 untuk GET kondisional. Contoh:
+#   python standin.py 8765
+#   PROMO_ROUTES="$(python standin.py --routes 8765)" python fetch_promo.py
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PLATFORMS = {
+    "gojek-voucher": "GoJek",
+    "grabfood": "Grab",
+    "shopee-kode-promo": "Shopee",
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = os.path.join(FIXTURE_DIR, self.path.strip("/") + ".html")
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def routes(port):
+    return [
+        {"platform": platform, "url": f"http://127.0.0.1:{port}/{name}"}
+        for name, platform in PLATFORMS.items()
+    ]
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--routes"]:
+        print(json.dumps(routes(int(sys.argv[2]))))
+        sys.exit(0)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    print(f"🧪 Stand-in promo di http://127.0.0.1:{port}/")
+    ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler).serve_forever()
@@ -1,14 +1,38 @@
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from datetime import datetime
 import boto3
+import json
 import os
+import sys
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from io import StringIO
+
+from lake.latest import write_latest
+from lake.metrics import add_rows, track
+from lake.multipart import MultipartWriter
+from lake.state import STATE_PREFIX, load_state, save_state
 
 # LOAD ENV
 load_dotenv()
 
+BUCKET = "sigma-lake"
+BRONZE_PREFIX = "bronze/sql/"
+WATERMARK_KEY = f"{STATE_PREFIX}export_sql/watermark.json"
+
+# Jumlah baris per query/chunk (memori export ~ 1 chunk + 1 part upload)
+CHUNK_ROWS = int(os.getenv("SQL_CHUNK_ROWS", "50000"))
+
+# Jumlah range id_makan yang diekstrak paralel (1 = satu stream biasa)
+WORKERS = max(1, int(os.getenv("SQL_EXPORT_WORKERS", "1")))
+
+# MODE: incremental (default, hanya id_makan > watermark) atau full refresh
+FULL_REFRESH = (
+    os.getenv("SQL_EXPORT_MODE", "incremental") == "full"
+    or "--full-refresh" in sys.argv
+)
+
 # MYSQL CONFIG
 DB_HOST = os.getenv("DB_HOST")
 DB_USER = os.getenv("DB_USER")
@@ -16,8 +40,11 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
 # SQLALCHEMY ENGINE
+# Pool minimal sebanyak worker paralel supaya tiap range dapat koneksi sendiri
 engine = create_engine(
-    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}",
+    pool_size=max(5, WORKERS),
+    pool_pre_ping=True,
 )
 
 # MINIO CONFIG
@@ -29,8 +56,10 @@ s3 = boto3.client(
 )
 
 # EXPORT QUERY
+# id_makan ikut diekspor supaya silver/gold bisa dedup antar delta & full refresh
 query = """
 SELECT
+    id_makan,
     tanggal,
     waktu,
     nama_warung,
@@ -42,17 +71,156 @@ SELECT
 FROM riwayat_makan
 """
 
-df = pd.read_sql(query, engine)
 
-# SAVE TO MINIO
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-key = f"bronze/sql/riwayat_makan_raw_{timestamp}.csv"
+# KEYSET PAGINATION: potongan CHUNK_ROWS baris per query (id_makan > id terakhir).
+# Driver mysqlconnector belum mendukung server-side cursor di SQLAlchemy,
+# jadi ini cara memori-datar yang tidak tergantung driver.
+# upper_id membatasi range (dipakai mode paralel), None = sampai habis.
+def iter_chunks(last_id, upper_id=None):
+    where = "WHERE id_makan > :last_id"
+    params = {"limit": CHUNK_ROWS}
+    if upper_id is not None:
+        where += " AND id_makan <= :upper_id"
+        params["upper_id"] = upper_id
+    chunk_query = text(f"{query}{where}\nORDER BY id_makan\nLIMIT :limit")
 
-csv_buffer = StringIO()
-df.to_csv(csv_buffer, index=False)
+    while True:
+        chunk = pd.read_sql(chunk_query, engine, params=dict(params, last_id=last_id))
+        if chunk.empty:
+            return
+        yield chunk
+        last_id = int(chunk["id_makan"].iloc[-1])
+        if len(chunk) < CHUNK_ROWS:
+            return
+
+
+# STREAMING: tiap chunk -> CSV -> buffer part multipart upload.
+# Return (rows, max_id), atau None kalau range-nya kosong (tidak ada objek).
+def export_range(key, mode, last_id, upper_id=None):
+    rows, max_id = 0, last_id
+    with MultipartWriter(
+        s3, BUCKET, key, "text/csv", metadata={"mode": mode, "from-id": str(last_id)}
+    ) as writer:
+        for chunk in iter_chunks(last_id, upper_id):
+            writer.write(chunk.to_csv(index=False, header=rows == 0))
+            rows += len(chunk)
+            max_id = int(chunk["id_makan"].iloc[-1])
+        uploaded = writer.close()
+    return None if uploaded is None else (rows, max_id)
+
+
+# RANGE id_makan (last_id, max] dibagi rata ke WORKERS bagian
+def split_ranges(last_id):
+    with engine.connect() as conn:
+        lo, hi = conn.execute(
+            text(
+                "SELECT MIN(id_makan), MAX(id_makan) FROM riwayat_makan "
+                "WHERE id_makan > :last_id"
+            ),
+            {"last_id": last_id},
+        ).one()
+    if lo is None:
+        return []
+
+    step = max(1, -(-(hi - lo + 1) // WORKERS))
+    bounds = list(range(lo - 1, hi, step)) + [hi]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# HAPUS PART: part tanpa manifest tidak pernah dibaca silver, cuma jadi sampah
+def delete_keys(keys):
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(
+            Bucket=BUCKET,
+            Delete={"Objects": [{"Key": k} for k in keys[i : i + 1000]]},
+        )
+    if keys:
+        print(f"🧹 {len(keys)} part bronze dari run gagal dihapus")
+
+
+# PARALEL: tiap range jadi part file sendiri, manifest = satu snapshot logis
+def export_parallel(run_key, mode, last_id):
+    ranges = split_ranges(last_id)
+    part_keys = [f"{run_key}/part-{i:05d}.csv" for i in range(len(ranges))]
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, export_range, key, mode, lo, hi)
+            for key, (lo, hi) in zip(part_keys, ranges)
+        ]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        # Part yang sudah ter-upload tidak punya manifest -> dihapus, run
+        # berikutnya mengulang dari watermark yang sama
+        uploaded = [
+            key
+            for key, f in zip(part_keys, futures)
+            if f.exception() is None and f.result() is not None
+        ]
+        delete_keys(uploaded)
+        raise errors[0]
+    results = [f.result() for f in futures]
+
+    parts = [
+        {"key": key, "rows": r[0], "max_id": r[1]}
+        for key, r in zip(part_keys, results)
+        if r is not None
+    ]
+    if not parts:
+        return None
+
+    manifest_key = f"{run_key}.manifest.json"
+    manifest = {
+        "mode": mode,
+        "from_id": last_id,
+        "to_id": max(p["max_id"] for p in parts),
+        "rows": sum(p["rows"] for p in parts),
+        "parts": [p["key"] for p in parts],
+        "created_at": datetime.now().isoformat(),
+    }
+    try:
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=manifest_key,
+            Body=json.dumps(manifest),
+            ContentType="application/json",
+        )
+    except Exception:
+        delete_keys(manifest["parts"])
+        raise
+    return manifest_key, manifest["rows"], manifest["to_id"]
+
+
+def main():
+    watermark = load_state(s3, BUCKET, WATERMARK_KEY, {"id_makan": 0})
+    last_id = 0 if FULL_REFRESH else int(watermark.get("id_makan", 0))
+    mode = "full" if FULL_REFRESH else "delta"
+
+    # SAVE TO MINIO (detik ikut di nama supaya delta per menit tidak bentrok)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    label = "raw" if mode == "full" else "delta"
+    run_key = f"{BRONZE_PREFIX}riwayat_makan_{label}_{timestamp}"
+
+    if WORKERS > 1:
+        result = export_parallel(run_key, mode, last_id)
+    else:
+        key = f"{run_key}.csv"
+        result = export_range(key, mode, last_id)
+        result = result and (key, *result)
+
+    if result is None:
+        print(f"⏭️ Tidak ada baris baru (id_makan > {last_id}), skip upload")
+        return
+    key, rows, max_id = result
+
+    write_latest(s3, BUCKET, BRONZE_PREFIX, key, rows=rows, mode=mode)
+
+    # Watermark baru disimpan SETELAH upload sukses
+    save_state(s3, BUCKET, WATERMARK_KEY, {"id_makan": max_id, "last_key": key})
+    add_rows(rows, rows)
+
+    print(f"SQL data saved to {key} ({mode}, {rows} rows, id_makan <= {max_id})")
 
-s3.put_object(
-    Bucket="sigma-lake", Key=key, Body=csv_buffer.getvalue(), ContentType="text/csv"
-)
 
-print(f"SQL data saved to {key}")
+if __name__ == "__main__":
+    with track(s3, BUCKET, "export_sql"):
+        main()
@@ -5,12 +5,22 @@ import boto3
 import os
 from dotenv import load_dotenv
 
+from lake.latest import write_latest
+from lake.metrics import add_rows, track
+
 # load env for cron
 load_dotenv()
 
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 CITY = os.getenv("CITY", "Banjarmasin")
 
+# OPENWEATHER_URL untuk mengarahkan ingestor ke server lain, mis. stand-in lokal
+WEATHER_URL = os.getenv(
+    "OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather"
+)
+
+BUCKET = "sigma-lake"
+
 s3 = boto3.client(
     "s3",
     endpoint_url=os.getenv("MINIO_ENDPOINT"),
@@ -18,21 +28,30 @@ s3 = boto3.client(
     aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
 )
 
-# fetch weather
-url = f"https://api.openweathermap.org/data/2.5/weather?q={CITY}&units=metric&appid={API_KEY}"
-response = requests.get(url, timeout=10)
-data = response.json()
-
-# filename
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-filename = f"bronze/weather/weather_raw_{timestamp}.json"
-
-# upload
-s3.put_object(
-    Bucket="sigma-lake",
-    Key=filename,
-    Body=json.dumps(data),
-    ContentType="application/json",
-)
 
-print(f"Weather data saved to {filename}")
+def main():
+    # fetch weather
+    params = {"q": CITY, "units": "metric", "appid": API_KEY}
+    response = requests.get(WEATHER_URL, params=params, timeout=10)
+    data = response.json()
+
+    # filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    filename = f"bronze/weather/weather_raw_{timestamp}.json"
+
+    # upload
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=filename,
+        Body=json.dumps(data),
+        ContentType="application/json",
+    )
+    write_latest(s3, BUCKET, "bronze/weather/", filename)
+
+    print(f"Weather data saved to {filename}")
+    add_rows(1, 1)
+
+
+if __name__ == "__main__":
+    with track(s3, BUCKET, "fetch_weather"):
+        main()
@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# STAND-IN OPENWEATHER LOKAL
+# Menyajikan fixtures/weather.json di /data/2.5/weather (nama kota dari ?q=
+# ikut dipakai), tanpa API key & tanpa internet. Contoh:
+#   python weather_standin.py 8766
+#   OPENWEATHER_URL=http://127.0.0.1:8766/data/2.5/weather python fetch_weather.py
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "weather.json"
+)
+WEATHER_PATH = "/data/2.5/weather"
+
+
+class WeatherHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != WEATHER_PATH:
+            self.send_error(404)
+            return
+
+        with open(FIXTURE_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        city = parse_qs(url.query).get("q")
+        if city:
+            data["name"] = city[0]
+        body = json.dumps(data).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def weather_url(port):
+    return f"http://127.0.0.1:{port}{WEATHER_PATH}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    print(f"🧪 Stand-in cuaca di {weather_url(port)}")
+    ThreadingHTTPServer(("127.0.0.1", port), WeatherHandler).serve_forever()
@@ -0,0 +1,2 @@
+# Shared helper untuk semua stage data lake (ingestor, processor, dashboard)
+BUCKET = "sigma-lake"
@@ -0,0 +1,160 @@
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from lake.compaction import load_index
+from lake.diskcache import read_object
+from lake.latest import pointer_key, write_latest
+from lake.s3 import is_compacted, list_objects, make_client
+
+# Timestamp di nama objek: nama_YYYYMMDD_HHMM(SS)[_partNNNNN].ext
+# Output silver diberi nama dari timestamp bronze-nya, jadi pasangan
+# bronze -> silver cukup dicocokkan lewat timestamp ini.
+KEY_TS_RE = re.compile(r"_(\d{8}_\d{4,6})(?:_part\d+)?\.[a-z]+(?:\.json)?$")
+
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", str(os.cpu_count() or 2)))
+
+
+def key_stamp(key):
+    match = KEY_TS_RE.search(posixpath.basename(key))
+    return match.group(1) if match else None
+
+
+# Dinormalisasi ke YYYYMMDD_HHMMSS supaya _HHMM dan _HHMMSS bisa dibandingkan
+def key_ts(key):
+    stamp = key_stamp(key)
+    return stamp.ljust(15, "0") if stamp else None
+
+
+def ts_datetime(ts):
+    return datetime.strptime(ts, "%Y%m%d_%H%M%S")
+
+
+# TIMESTAMP BRONZE YANG SUDAH PUNYA SILVER: objek yang masih ada + sumber yang
+# sudah digabung compaction (objek aslinya bisa sudah dihapus retention)
+def done_timestamps(s3, bucket, silver_prefix, silver_name):
+    keys = [
+        o["Key"]
+        for o in list_objects(s3, bucket, silver_prefix)
+        if not is_compacted(o["Key"])
+    ]
+    for meta in load_index(s3, bucket, silver_prefix).get("objects", {}).values():
+        keys += meta["sources"]
+    return {
+        key_ts(key)
+        for key in keys
+        if posixpath.basename(key).startswith(f"{silver_name}_")
+    } - {None}
+
+
+# BRONZE TANPA SILVER, urut waktu. accept: filter key bronze (mis. bukan part file)
+def pending_objects(
+    s3, bucket, bronze_prefix, silver_prefix, silver_name, since=None, accept=None
+):
+    done = done_timestamps(s3, bucket, silver_prefix, silver_name)
+    pending = []
+    for obj in list_objects(s3, bucket, bronze_prefix):
+        key = obj["Key"]
+        if is_compacted(key) or (accept and not accept(key)):
+            continue
+        ts = key_ts(key)
+        if ts is None or ts in done or (since and ts < since):
+            continue
+        pending.append(key)
+    return sorted(pending, key=key_ts)
+
+
+# PROCESS POOL: tiap worker punya client S3 sendiri (client tidak bisa di-pickle).
+# spawn, bukan fork: proses induk punya thread (pool koneksi, sampler metrics)
+_worker_s3 = None
+
+
+def _init_worker():
+    global _worker_s3
+    _worker_s3 = make_client()
+
+
+def _call(fn, key):
+    return fn(_worker_s3, key)
+
+
+# fn(s3, key) per objek di proses terpisah (pandas/regex CPU-bound tidak tertahan
+# GIL). Yield (key, hasil, error) urut selesai; satu objek gagal tidak
+# menghentikan yang lain, run berikutnya mengulang yang gagal saja.
+def run_parallel(fn, keys, label, workers=BACKFILL_WORKERS):
+    if not keys:
+        return
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(keys))),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool:
+        futures = {pool.submit(_call, fn, key): key for key in keys}
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - started
+            eta = elapsed / done * (len(keys) - done)
+            print(
+                f"{'❌' if error else '⏳'} [{label}] {done}/{len(keys)} "
+                f"({done / len(keys):.0%}, sisa ~{eta:.0f} s) {key}"
+                + (f": {error}" if error else "")
+            )
+            yield key, result, error
+
+
+# URUT KEY: hasil yang selesai duluan ditahan sampai giliran key sebelumnya.
+# Rantai berhenti di objek gagal pertama (sisanya diulang di run berikutnya).
+def in_order(results, keys):
+    position = {key: i for i, key in enumerate(keys)}
+    waiting = {}
+    next_index = 0
+    for key, result, error in results:
+        waiting[position[key]] = (key, result, error)
+        while next_index in waiting:
+            key, result, error = waiting.pop(next_index)
+            if error:
+                return
+            yield key, result
+            next_index += 1
+
+
+# POINTER _latest: maju kalau hasil backfill lebih baru, kalau tidak ditulis
+# ulang apa adanya (ETag berubah -> runner pipeline tahu ada objek silver baru)
+def bump_latest(s3, bucket, prefix, newest_key, keys=None, **meta):
+    try:
+        body = read_object(s3, bucket, pointer_key(prefix))
+        pointer = json.loads(body)
+    except s3.exceptions.NoSuchKey:
+        pointer = {}
+
+    backfilled_at = datetime.now().isoformat()
+    current_ts = key_ts(pointer.get("key", "")) or ""
+    if key_ts(newest_key) >= current_ts:
+        return write_latest(
+            s3,
+            bucket,
+            prefix,
+            newest_key,
+            keys=keys or [newest_key],
+            backfilled_at=backfilled_at,
+            **meta,
+        )
+
+    pointer = dict(pointer, backfilled_at=backfilled_at)
+    s3.put_object(
+        Bucket=bucket,
+        Key=pointer_key(prefix),
+        Body=json.dumps(pointer),
+        ContentType="application/json",
+    )
+    return pointer
@@ -0,0 +1,59 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError
+
+from lake.diskcache import read_object
+from lake.s3 import POOL_SIZE
+
+MAX_WORKERS = int(os.getenv("LAKE_FETCH_WORKERS", "16"))
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 0.5
+
+
+# GET + decode satu key (lewat cache disk). Error request/HTTP sudah di-retry
+# botocore, di sini cuma retry putus koneksi waktu baca body (BotoCoreError).
+def _fetch_one(s3, bucket, key, decode, etag=None):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            body = read_object(s3, bucket, key, etag)
+            break
+        except BotoCoreError:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return decode(key, body) if decode else body
+
+
+# BULK FETCH: paralel, hasil urut sesuai urutan keys, key gagal dilewati
+# decode(key, body) ikut jalan di thread pool
+# etags: {key: ETag} dari listing -> objek yang ada di cache disk tanpa request
+# Tiap task jalan di salinan context pemanggil -> request terhitung ke stage-nya
+def fetch_many(s3, bucket, keys, decode=None, max_workers=MAX_WORKERS, etags=None):
+    keys = list(keys)
+    if not keys:
+        return []
+
+    workers = max(1, min(max_workers, POOL_SIZE, len(keys)))
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                contextvars.copy_context().run,
+                _fetch_one,
+                s3,
+                bucket,
+                k,
+                decode,
+                (etags or {}).get(k),
+            )
+            for k in keys
+        ]
+        for key, future in zip(keys, futures):
+            try:
+                results.append((key, future.result()))
+            except Exception as e:
+                print(f"⚠️ Gagal load {key}: {e}")
+    return results
@@ -0,0 +1,231 @@
+import json
+import posixpath
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from lake.bulk import fetch_many
+from lake.diskcache import read_object
+from lake.formats import (
+    NDJSON_CONTENT_TYPE,
+    PARQUET_CONTENT_TYPE,
+    file_type_of,
+    json_records,
+    parse_body,
+    to_parquet_bytes,
+)
+from lake.latest import resolve_latest_keys
+from lake.s3 import COMPACTED_DIR, is_compacted, list_objects
+from lake.state import STATE_PREFIX, load_state, save_state
+
+# Index per prefix: objek compacted -> daftar key sumber yang sudah digabung.
+# Index = titik commit: objek compacted baru terlihat (dan sumbernya
+# disembunyikan) hanya setelah index-nya tersimpan.
+INDEX_PREFIX = f"{STATE_PREFIX}compaction/"
+
+# nama_YYYYMMDD_HHMM(SS) -> nama & tanggal dari key, fallback ke LastModified
+KEY_TS_RE = re.compile(r"^(.*?)_(\d{8})_\d{4,6}$")
+
+DELETE_BATCH = 1000
+
+
+def index_key(prefix):
+    return f"{INDEX_PREFIX}{prefix.strip('/').replace('/', '__')}.json"
+
+
+def load_index(s3, bucket, prefix):
+    return load_state(s3, bucket, index_key(prefix), {"objects": {}})
+
+
+# PEMBACA: isi prefix sama seperti sebelum compaction, tanpa baris dobel
+def visible_objects(s3, bucket, prefix):
+    compacted = load_index(s3, bucket, prefix).get("objects", {})
+    covered = {src for meta in compacted.values() for src in meta["sources"]}
+    for obj in list_objects(s3, bucket, prefix):
+        key = obj["Key"]
+        if is_compacted(key):
+            if key in compacted:
+                yield obj
+        elif key not in covered:
+            yield obj
+
+
+def _group_of(prefix, obj, period):
+    key = obj["Key"]
+    folder, base = posixpath.split(key[len(prefix) :])
+    stem, ext = posixpath.splitext(base)
+    match = KEY_TS_RE.match(stem)
+    if match:
+        name, day = match.group(1), match.group(2)
+    else:
+        name, day = "objects", obj["LastModified"].strftime("%Y%m%d")
+    bucket_period = day if period == "daily" else day[:6]
+    return (folder, name, bucket_period, file_type_of(key)), day
+
+
+def _is_closed(bucket_period, period, now):
+    current = now.strftime("%Y%m%d") if period == "daily" else now.strftime("%Y%m")
+    return bucket_period < current
+
+
+def _group_id(group):
+    folder, name, bucket_period, file_type = group
+    return f"{folder}|{name}|{bucket_period}|{file_type}"
+
+
+def _compacted_key(prefix, group, out_type, run_ts):
+    folder, name, bucket_period, _ = group
+    folder = f"{folder}/" if folder else ""
+    ext = "parquet" if out_type == "parquet" else "ndjson"
+    return f"{prefix}{COMPACTED_DIR}{folder}{name}_{bucket_period}_{run_ts}.{ext}"
+
+
+# GABUNG ISI: objek compacted lama (kalau ada) + sumber baru, urut sesuai key
+def _merge(s3, bucket, previous_key, keys, out_type):
+    if out_type == "parquet":
+        frames = fetch_many(
+            s3, bucket, keys, lambda key, body: parse_body(body, file_type_of(key))
+        )
+        loaded = [k for k, _ in frames]
+        if previous_key:
+            body = read_object(s3, bucket, previous_key)
+            frames.insert(0, (previous_key, parse_body(body, "parquet")))
+        df = pd.concat([f for _, f in frames], ignore_index=True)
+        return to_parquet_bytes(df), loaded, len(df)
+
+    def to_lines(key, body):
+        if file_type_of(key) == "ndjson":
+            return [line for line in body.splitlines() if line.strip()]
+        return [
+            json.dumps(r, ensure_ascii=False).encode("utf-8")
+            for r in json_records(json.loads(body))
+        ]
+
+    fetched = fetch_many(s3, bucket, keys, to_lines)
+    loaded = [k for k, _ in fetched]
+    lines = []
+    if previous_key:
+        body = read_object(s3, bucket, previous_key)
+        lines = to_lines(previous_key, body)
+    for _, part in fetched:
+        lines.extend(part)
+    return b"\n".join(lines) + b"\n", loaded, len(lines)
+
+
+# COMPACTION SATU PREFIX
+# period   : "daily" / "monthly", hanya periode yang sudah lewat yang digabung
+# fmt      : format hasil untuk sumber JSON ("ndjson" / "parquet"),
+#            sumber parquet selalu jadi parquet
+# retention_days: hapus sumber asli yang sudah di-compact & lebih tua dari N hari
+# protect_latest: lindungi objek pointer _latest (False untuk prefix tanpa pointer,
+#                 mis. _metrics/, supaya tidak dibuatkan pointer basi)
+def compact_prefix(
+    s3,
+    bucket,
+    prefix,
+    period="daily",
+    fmt="ndjson",
+    retention_days=None,
+    now=None,
+    protect_latest=True,
+):
+    now = now or datetime.now()
+    run_ts = now.strftime("%Y%m%d_%H%M%S")
+    index = load_index(s3, bucket, prefix)
+    objects = dict(index.get("objects", {}))
+    covered = {src for meta in objects.values() for src in meta["sources"]}
+    by_group = {meta["group"]: key for key, meta in objects.items()}
+    # Objek yang sedang ditunjuk pointer _latest tidak boleh digabung
+    protected = (
+        set(resolve_latest_keys(s3, bucket, prefix)) if protect_latest else set()
+    )
+
+    groups = {}
+    for obj in list_objects(s3, bucket, prefix):
+        key = obj["Key"]
+        if is_compacted(key) or key in covered or key in protected:
+            continue
+        # Cuma objek baris (json/ndjson/parquet), mis. profil .pstats dilewati
+        if file_type_of(key, None) not in ("json", "ndjson", "parquet"):
+            continue
+        group, day = _group_of(prefix, obj, period)
+        if _is_closed(group[2], period, now):
+            groups.setdefault(group, []).append((key, day))
+
+    superseded = []
+    for group, members in sorted(groups.items()):
+        gid = _group_id(group)
+        previous_key = by_group.get(gid)
+        previous = objects.get(previous_key, {})
+        out_type = "parquet" if group[3] == "parquet" or fmt == "parquet" else "ndjson"
+        keys = sorted(k for k, _ in members)
+
+        body, loaded, rows = _merge(s3, bucket, previous_key, keys, out_type)
+        if not loaded:
+            continue
+        days = [d for k, d in members if k in set(loaded)]
+        output_key = _compacted_key(prefix, group, out_type, run_ts)
+        s3.put_object(
+            Bucket=bucket,
+            Key=output_key,
+            Body=body,
+            ContentType=(
+                PARQUET_CONTENT_TYPE if out_type == "parquet" else NDJSON_CONTENT_TYPE
+            ),
+        )
+
+        if previous_key:
+            objects.pop(previous_key)
+            superseded.append(previous_key)
+        objects[output_key] = {
+            "group": gid,
+            "sources": previous.get("sources", []) + loaded,
+            "first_day": min(days + [previous.get("first_day", days[0])]),
+            "last_day": max(days + [previous.get("last_day", days[0])]),
+            "rows": rows,
+            "purged": False,
+            "compacted_at": now.isoformat(),
+        }
+        print(
+            f"🗜️ {output_key}: {len(loaded)} objek digabung ({rows} baris)"
+            + (f", menggantikan {previous_key}" if previous_key else "")
+        )
+
+    if superseded or groups:
+        save_state(
+            s3, bucket, index_key(prefix), {"prefix": prefix, "objects": objects}
+        )
+    # Versi compacted lama baru dihapus setelah index menunjuk versi baru
+    _delete(s3, bucket, superseded)
+
+    if retention_days is not None:
+        _apply_retention(s3, bucket, prefix, objects, retention_days, now)
+
+    return objects
+
+
+def _apply_retention(s3, bucket, prefix, objects, retention_days, now):
+    cutoff = (now - timedelta(days=retention_days)).strftime("%Y%m%d")
+    purge = [
+        key
+        for key, meta in objects.items()
+        if not meta.get("purged") and meta["last_day"] < cutoff
+    ]
+    if not purge:
+        return
+
+    _delete(s3, bucket, [src for key in purge for src in objects[key]["sources"]])
+    for key in purge:
+        objects[key] = dict(objects[key], purged=True)
+    save_state(s3, bucket, index_key(prefix), {"prefix": prefix, "objects": objects})
+    print(f"🧹 {prefix}: sumber asli {len(purge)} objek compacted dihapus (retention)")
+
+
+def _delete(s3, bucket, keys):
+    for start in range(0, len(keys), DELETE_BATCH):
+        batch = keys[start : start + DELETE_BATCH]
+        s3.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True},
+        )
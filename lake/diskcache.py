@@ -0,0 +1,257 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from botocore.exceptions import ClientError
+
+# CACHE DISK LOKAL (read-through) untuk objek S3/MinIO, key = bucket/key/ETag.
+# Isi objek dengan ETag tertentu tidak pernah berubah, jadi entry tidak perlu
+# di-invalidate: objek yang ditimpa otomatis punya ETag (= entry) baru.
+#   <dir>/objects/ab/<sha256(bucket, key, etag)>  isi objek
+#   <dir>/refs/ab/<sha256(bucket, key)>           ETag terakhir yang dilihat
+# Aman dipakai banyak proses sekaligus: file ditulis ke tmp lalu os.replace
+# (pembaca tidak pernah lihat setengah file), eviction dikunci flock.
+CACHE_DIR = os.getenv(
+    "LAKE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sigma-lake-cache")
+)
+CACHE_MAX_BYTES = int(float(os.getenv("LAKE_CACHE_MAX_MB", "1024")) * 2**20)
+ENABLED = os.getenv("LAKE_CACHE_ENABLED", "1") == "1" and CACHE_MAX_BYTES > 0
+
+# Eviction dicek tiap sekian byte ditulis proses ini, lalu dipangkas sampai
+# di bawah LOW_WATERMARK x batas (tidak evict tiap kali tulis)
+EVICT_CHECK_FRACTION = 0.05
+LOW_WATERMARK = 0.9
+COPY_CHUNK = 1024 * 1024
+
+
+def _digest(*parts):
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stored = 0
+        self.written = 0
+
+    def _path(self, kind, digest):
+        return os.path.join(self.directory, kind, digest[:2], digest)
+
+    def entry_path(self, bucket, key, etag):
+        return self._path("objects", _digest(bucket, key, etag))
+
+    def ref_path(self, bucket, key):
+        return self._path("refs", _digest(bucket, key))
+
+    # ETag terakhir untuk bucket/key (None kalau belum pernah / entry sudah dibuang)
+    def known_etag(self, bucket, key):
+        try:
+            with open(self.ref_path(bucket, key)) as f:
+                etag = f.read()
+        except OSError:
+            return None
+        return etag if os.path.exists(self.entry_path(bucket, key, etag)) else None
+
+    # Buka entry (None kalau tidak ada); mtime disentuh = urutan LRU
+    def open(self, bucket, key, etag):
+        path = self.entry_path(bucket, key, etag)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self.lock:
+            self.hits += 1
+        return f
+
+    def read(self, bucket, key, etag):
+        f = self.open(bucket, key, etag)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def _atomic_write(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    # Simpan isi objek (bytes atau stream); gagal tulis cache tidak fatal
+    def store(self, bucket, key, etag, body):
+        path = self.entry_path(bucket, key, etag)
+        try:
+            if isinstance(body, (bytes, bytearray)):
+                self._atomic_write(path, lambda f: f.write(body))
+            else:
+                self._atomic_write(
+                    path, lambda f: shutil.copyfileobj(body, f, COPY_CHUNK)
+                )
+            self._atomic_write(
+                self.ref_path(bucket, key), lambda f: f.write(etag.encode())
+            )
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"⚠️ Cache lokal {key} gagal ditulis: {e}")
+            return None
+
+        with self.lock:
+            self.stored += 1
+            self.written += size
+            check = self.written >= self.max_bytes * EVICT_CHECK_FRACTION
+            if check:
+                self.written = 0
+        if check:
+            self.evict()
+        return path
+
+    # LRU: entry dengan mtime paling lama dibuang sampai di bawah batas.
+    # Proses lain yang sedang evict -> lewati (LOCK_NB)
+    def evict(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            entries = []
+            total = 0
+            for root, _, files in os.walk(os.path.join(self.directory, "objects")):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            target = self.max_bytes * LOW_WATERMARK
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    # File yang sedang dibaca proses lain tetap bisa dibaca
+                    # sampai ditutup (unlink POSIX)
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            print(f"🧹 Cache lokal: {removed} objek dibuang (LRU)")
+            return removed
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "stored": self.stored}
+
+
+_cache = DiskCache(CACHE_DIR, CACHE_MAX_BYTES) if ENABLED else None
+
+
+def get_cache():
+    return _cache
+
+
+def _not_modified(e):
+    return e.response["Error"]["Code"] in ("304", "NotModified")
+
+
+# GET READ-THROUGH -> (etag, body)
+#   etag         : ETag yang sudah diketahui (mis. dari listing) -> hit tanpa request
+#   if_none_match: ETag yang sudah dipegang pemanggil di memori; kalau objek
+#                  tidak berubah hasilnya (etag, None)
+# Selain itu GET kondisional dengan ETag terakhir di cache (304 -> dari disk).
+def fetch_object(s3, bucket, key, etag=None, if_none_match=None):
+    cache = _cache
+    if cache and etag and not if_none_match:
+        body = cache.read(bucket, key, etag)
+        if body is not None:
+            return etag, body
+
+    known = cache.known_etag(bucket, key) if cache else None
+    params = {"Bucket": bucket, "Key": key}
+    if if_none_match or known:
+        params["IfNoneMatch"] = if_none_match or known
+    try:
+        resp = s3.get_object(**params)
+    except ClientError as e:
+        if not _not_modified(e):
+            raise
+        if if_none_match:
+            return if_none_match, None
+        body = cache.read(bucket, key, known)
+        if body is not None:
+            return known, body
+        # Entry hilang di antara cek & baca (eviction proses lain)
+        resp = s3.get_object(Bucket=bucket, Key=key)
+
+    body = resp["Body"].read()
+    if cache:
+        cache.store(bucket, key, resp["ETag"], body)
+    return resp["ETag"], body
+
+
+def read_object(s3, bucket, key, etag=None):
+    return fetch_object(s3, bucket, key, etag)[1]
+
+
+# STREAM: objek besar ditulis ke cache per chunk lalu dibaca dari disk,
+# tidak pernah utuh di memori. Tanpa cache -> body S3 langsung.
+def open_object(s3, bucket, key, etag=None):
+    cache = _cache
+    if cache is None:
+        return s3.get_object(Bucket=bucket, Key=key)["Body"]
+
+    if etag:
+        f = cache.open(bucket, key, etag)
+        if f is not None:
+            return f
+
+    known = cache.known_etag(bucket, key)
+    try:
+        if known:
+            resp = s3.get_object(Bucket=bucket, Key=key, IfNoneMatch=known)
+        else:
+            resp = s3.get_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if not _not_modified(e):
+            raise
+        f = cache.open(bucket, key, known)
+        if f is not None:
+            return f
+        resp = s3.get_object(Bucket=bucket, Key=key)
+
+    path = cache.store(bucket, key, resp["ETag"], resp["Body"])
+    try:
+        return open(path, "rb")
+    except (OSError, TypeError):
+        # Cache tidak bisa ditulis / sudah dibuang: stream terpakai, ambil ulang
+        return s3.get_object(Bucket=bucket, Key=key)["Body"]
+
+
+# Isi yang baru di-upload pemanggil (mis. snapshot state) langsung masuk cache
+def store_object(bucket, key, etag, body):
+    if _cache:
+        _cache.store(bucket, key, etag, body)
@@ -0,0 +1,87 @@
+import re
+from datetime import time
+
+import pandas as pd
+
+# FITUR KEPUTUSAN: satu definisi untuk training gold & scoring dashboard.
+# Semua operasi per kolom (vectorized), tidak ada .apply per baris.
+FEATURES = ["harga", "is_hujan", "suhu", "ada_promo", "is_lunch_time"]
+TARGET = "kepuasan"
+
+# Model serving dashboard: fitur + is_takeaway
+SERVING_FEATURES = FEATURES + ["is_takeaway"]
+
+# Tabel fitur gold/features/: satu baris per transaksi (id_makan)
+FEATURES_PREFIX = "gold/features/"
+KEY_COLUMNS = ["id_makan", "datetime_makan"]
+TABLE_COLUMNS = KEY_COLUMNS + SERVING_FEATURES + [TARGET]
+
+HUJAN_KEYWORDS = ["rain", "drizzle", "thunderstorm", "storm"]
+HUJAN_RE = "|".join(re.escape(k) for k in HUJAN_KEYWORDS)
+
+# Jam makan siang 11:00 - 14:00 (inklusif), sama untuk training & dashboard
+LUNCH_START = time(11, 0)
+LUNCH_END = time(14, 0)
+
+
+def _offset(t):
+    return pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
+
+
+def is_hujan(kondisi):
+    return (
+        kondisi.astype(str)
+        .str.lower()
+        .str.contains(HUJAN_RE, regex=True, na=False)
+        .astype(int)
+    )
+
+
+# moments: Series datetime; jam dibandingkan sebagai selisih dari tengah malam
+def is_lunch_time(moments):
+    offset = moments - moments.dt.normalize()
+    return offset.between(_offset(LUNCH_START), _offset(LUNCH_END)).astype(int)
+
+
+# Versi satu nilai (jam dari sidebar dashboard)
+def lunch_flag(t):
+    return int(LUNCH_START <= t <= LUNCH_END)
+
+
+def is_takeaway(metode):
+    return (metode.astype(str).str.lower() == "takeaway").astype(int)
+
+
+# HASIL BINDING (kondisi, jumlah_promo, datetime_makan, metode) -> kolom fitur
+def build_features(df_bound):
+    df_bound["is_hujan"] = is_hujan(df_bound["kondisi"])
+    df_bound["ada_promo"] = (df_bound["jumlah_promo"] > 0).astype(int)
+    df_bound["is_lunch_time"] = is_lunch_time(df_bound["datetime_makan"])
+    df_bound["is_takeaway"] = (
+        is_takeaway(df_bound["metode"]) if "metode" in df_bound.columns else 0
+    )
+    return df_bound.dropna(subset=[TARGET, "harga"])
+
+
+# Tabel fitur yang dimaterialisasi (silver lama tanpa id_makan -> id kosong)
+def feature_table(df_features):
+    return (
+        df_features.reindex(columns=TABLE_COLUMNS)
+        .sort_values("datetime_makan")
+        .reset_index(drop=True)
+    )
+
+
+# INPUT SCORING: satu baris per harga, konteks (cuaca, promo, jam) sama semua
+def scoring_frame(harga, is_hujan, suhu, ada_promo, lunch, takeaway=0):
+    return pd.DataFrame(
+        {
+            "harga": harga,
+            "is_hujan": is_hujan,
+            "suhu": suhu,
+            "ada_promo": ada_promo,
+            "is_lunch_time": lunch,
+            "is_takeaway": takeaway,
+        },
+        columns=SERVING_FEATURES,
+    )
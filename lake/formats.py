@@ -0,0 +1,113 @@
+import io
+import json
+import os
+import re
+
+import pandas as pd
+
+# Format tulis silver/gold: "json" (default, seperti sebelumnya) atau "parquet"
+LAKE_FORMAT = os.getenv("LAKE_FORMAT", "json")
+
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# Partisi gaya Hive di path key: .../tanggal=2025-12-15/file.parquet
+PARTITION_RE = re.compile(r"([^/=]+)=([^/]+)/")
+
+
+def file_type_of(key, default="json"):
+    if key.endswith(".parquet"):
+        return "parquet"
+    if key.endswith(".csv"):
+        return "csv"
+    if key.endswith(".ndjson"):
+        return "ndjson"
+    if key.endswith(".json"):
+        return "json"
+    return default
+
+
+def partition_of(key):
+    return dict(PARTITION_RE.findall(key))
+
+
+def _select(df, columns):
+    if columns is None:
+        return df
+    return df[[c for c in columns if c in df.columns]]
+
+
+# PARSE ISI OBJEK -> DATAFRAME (json / ndjson / csv / parquet)
+def parse_body(body, file_type="json", columns=None):
+    if file_type == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.ParquetFile(io.BytesIO(body))
+        if columns is not None:
+            names = set(table.schema_arrow.names)
+            columns = [c for c in columns if c in names]
+        return table.read(columns=columns).to_pandas()
+
+    if file_type == "csv":
+        usecols = None if columns is None else (lambda c: c in columns)
+        return pd.read_csv(io.BytesIO(body), usecols=usecols)
+
+    if file_type == "ndjson":
+        records = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        records = json_records(json.loads(body))
+    return _select(pd.DataFrame(records), columns)
+
+
+# Baris dari satu dokumen JSON: {"data": [...]}, satu objek, atau list objek
+def json_records(content):
+    if isinstance(content, dict) and "data" in content:
+        data = content["data"]
+        return data if isinstance(data, list) else [data]
+    if isinstance(content, dict):
+        return [content]
+    if isinstance(content, list):
+        return content
+    return []
+
+
+def to_parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+# TULIS PARQUET PER PARTISI: {prefix}{col}={nilai}/{name}.parquet
+def write_partitioned(s3, bucket, prefix, df, partition_col, name):
+    if df.empty:
+        # Tetap tulis satu objek kosong supaya run ini tercatat
+        key = f"{prefix}{name}.parquet"
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=to_parquet_bytes(df),
+            ContentType=PARQUET_CONTENT_TYPE,
+        )
+        return [key]
+
+    keys = []
+    for value, part in df.groupby(partition_col, sort=True):
+        key = f"{prefix}{partition_col}={value}/{name}.parquet"
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=to_parquet_bytes(part.reset_index(drop=True)),
+            ContentType=PARQUET_CONTENT_TYPE,
+        )
+        keys.append(key)
+    return keys
+
+
+# FILTER PARTISI: key tanpa partisi (json lama) selalu lolos
+def in_partitions(key, partitions):
+    if not partitions:
+        return True
+    found = partition_of(key)
+    return all(
+        col not in found or found[col] in allowed for col, allowed in partitions.items()
+    )
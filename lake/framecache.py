@@ -0,0 +1,47 @@
+import threading
+
+from lake.diskcache import fetch_object
+
+
+# CACHE FRAME PER OBJEK: key -> (ETag, hasil parse).
+# Objek yang sudah di-cache dibaca dengan GET kondisional (If-None-Match),
+# jadi kalau tidak berubah MinIO cuma balas 304 tanpa body. Miss di memori
+# (mis. proses baru) dibaca lewat cache disk lokal.
+class FrameCache:
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, s3, bucket, key, parse):
+        with self.lock:
+            entry = self.entries.get(key)
+
+        etag, body = fetch_object(
+            s3, bucket, key, if_none_match=entry[0] if entry else None
+        )
+        if body is None:
+            with self.lock:
+                self.hits += 1
+            return entry[1]
+
+        value = parse(body)
+        with self.lock:
+            self.entries[key] = (etag, value)
+            self.misses += 1
+        return value
+
+    # Buang entry yang key-nya sudah tidak dipakai (mis. gold lama)
+    def retain(self, keys):
+        with self.lock:
+            for key in set(self.entries) - set(keys):
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "objects": len(self.entries),
+            }
@@ -0,0 +1,126 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+
+from lake.bulk import fetch_many
+from lake.compaction import visible_objects
+from lake.diskcache import read_object, store_object
+from lake.formats import file_type_of, in_partitions, parse_body
+
+# State loader disimpan di bucket yang sama, di luar prefix bronze/silver/gold
+STATE_PREFIX = "_state/incremental/"
+
+# Kolom asal objek, dipakai untuk membuang baris kalau objeknya berubah/dihapus
+SOURCE_COL = "_source_key"
+
+
+def _state_name(prefix):
+    return prefix.strip("/").replace("/", "__")
+
+
+def _state_keys(prefix):
+    base = f"{STATE_PREFIX}{_state_name(prefix)}/"
+    return base + "manifest.json", base + "snapshot.json"
+
+
+# MANIFEST: key -> ETag yang sudah masuk snapshot
+def read_manifest(s3, bucket, prefix):
+    manifest_key, _ = _state_keys(prefix)
+    try:
+        body = read_object(s3, bucket, manifest_key)
+    except s3.exceptions.NoSuchKey:
+        return {"objects": {}}
+    return json.loads(body)
+
+
+# SNAPSHOT: lewat cache disk lokal, ETag dari manifest -> hit tanpa request
+def read_snapshot(s3, bucket, prefix, manifest):
+    snapshot_etag = manifest.get("snapshot_etag")
+    if not snapshot_etag:
+        return pd.DataFrame()
+
+    _, snapshot_key = _state_keys(prefix)
+    body = read_object(s3, bucket, snapshot_key, etag=snapshot_etag)
+    return pd.DataFrame(json.loads(body))
+
+
+# SIMPAN STATE: snapshot dulu, manifest terakhir (manifest = titik commit)
+def write_state(s3, bucket, prefix, df, objects, columns=None):
+    manifest_key, snapshot_key = _state_keys(prefix)
+    body = df.to_json(orient="records", date_format="iso", force_ascii=False).encode()
+    resp = s3.put_object(
+        Bucket=bucket, Key=snapshot_key, Body=body, ContentType="application/json"
+    )
+    snapshot_etag = resp["ETag"]
+
+    manifest = {
+        "prefix": prefix,
+        "objects": objects,
+        "columns": columns,
+        "rows": len(df),
+        "snapshot_etag": snapshot_etag,
+        "updated_at": datetime.now().isoformat(),
+    }
+    s3.put_object(
+        Bucket=bucket,
+        Key=manifest_key,
+        Body=json.dumps(manifest),
+        ContentType="application/json",
+    )
+    store_object(bucket, snapshot_key, snapshot_etag, body)
+
+
+# LOAD INCREMENTAL: hanya objek baru/berubah yang di-download
+# columns  : kolom yang dibutuhkan (parquet hanya membaca kolom ini)
+# partitions: {kolom: set nilai}, key partisi di luar set tidak dibaca
+def load_incremental(
+    s3, bucket, prefix, file_type="json", columns=None, partitions=None
+):
+    manifest = read_manifest(s3, bucket, prefix)
+    if manifest.get("columns") != columns:
+        # Kolom berubah -> snapshot lama tidak bisa dipakai
+        manifest = {"objects": {}}
+    consumed = manifest.get("objects", {})
+    current = {
+        o["Key"]: o["ETag"]
+        for o in visible_objects(s3, bucket, prefix)
+        if in_partitions(o["Key"], partitions)
+    }
+
+    new_keys = [k for k, etag in current.items() if consumed.get(k) != etag]
+    stale = {k for k in consumed if current.get(k) != consumed[k]}
+
+    snapshot = read_snapshot(s3, bucket, prefix, manifest)
+    if not new_keys and not stale:
+        print(
+            f"♻️ {prefix}: tidak ada objek baru ({len(snapshot)} baris dari snapshot)"
+        )
+        return snapshot.drop(columns=[SOURCE_COL], errors="ignore")
+
+    if stale and SOURCE_COL in snapshot.columns:
+        snapshot = snapshot[~snapshot[SOURCE_COL].isin(stale)]
+
+    loaded = {k: etag for k, etag in consumed.items() if k not in stale}
+    frames = [snapshot]
+    fetched = fetch_many(
+        s3,
+        bucket,
+        new_keys,
+        lambda key, body: parse_body(body, file_type_of(key, file_type), columns),
+        etags=current,
+    )
+    for key, df in fetched:
+        df[SOURCE_COL] = key
+        frames.append(df)
+        loaded[key] = current[key]
+
+    frames = [f for f in frames if not f.empty]
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    write_state(s3, bucket, prefix, merged, loaded, columns)
+
+    print(
+        f"♻️ {prefix}: {len(new_keys)} objek baru/berubah, "
+        f"{len(stale)} dibuang, total {len(merged)} baris"
+    )
+    return merged.drop(columns=[SOURCE_COL], errors="ignore")
@@ -0,0 +1,72 @@
+import json
+import posixpath
+from datetime import datetime
+
+from lake.diskcache import read_object
+from lake.s3 import is_compacted, list_objects
+
+# Pointer "objek terbaru" per prefix, disimpan di luar prefix datanya
+# supaya tidak ikut ter-list oleh pembaca prefix tersebut.
+LATEST_PREFIX = "_latest/"
+
+
+def pointer_key(prefix):
+    return f"{LATEST_PREFIX}{prefix.strip('/')}.json"
+
+
+# WRITER: panggil setelah put_object data berhasil.
+# Output parquet berpartisi = beberapa objek per run, kirim lewat keys=[...]
+def write_latest(s3, bucket, prefix, key, **meta):
+    pointer = {"prefix": prefix, "key": key, "updated_at": datetime.now().isoformat()}
+    pointer.update(meta)
+    s3.put_object(
+        Bucket=bucket,
+        Key=pointer_key(prefix),
+        Body=json.dumps(pointer),
+        ContentType="application/json",
+    )
+    return pointer
+
+
+# FALLBACK: list paginated + sort, lalu tulis ulang pointer-nya
+def rebuild_latest(s3, bucket, prefix):
+    # Hasil compaction = arsip, bukan kandidat "terbaru"
+    objects = [
+        o for o in list_objects(s3, bucket, prefix) if not is_compacted(o["Key"])
+    ]
+    # LastModified cuma presisi detik, key (ber-timestamp) jadi tie-breaker
+    newest = max(objects, key=lambda o: (o["LastModified"], o["Key"]), default=None)
+    if newest is None:
+        return None
+
+    print(f"🔎 Pointer {pointer_key(prefix)} tidak ada, index dibangun ulang")
+    # Satu run parquet menulis nama file yang sama di tiap folder partisi
+    name = posixpath.basename(newest["Key"])
+    keys = [o["Key"] for o in objects if posixpath.basename(o["Key"]) == name]
+    return write_latest(s3, bucket, prefix, newest["Key"], keys=keys, rebuilt=True)
+
+
+# READER: satu GET ke pointer, fallback ke listing kalau pointer belum ada
+def read_latest(s3, bucket, prefix):
+    try:
+        body = read_object(s3, bucket, pointer_key(prefix))
+        pointer = json.loads(body)
+    except s3.exceptions.NoSuchKey:
+        pointer = None
+
+    if pointer and pointer.get("key"):
+        return pointer
+    return rebuild_latest(s3, bucket, prefix)
+
+
+def resolve_latest(s3, bucket, prefix):
+    pointer = read_latest(s3, bucket, prefix)
+    return pointer["key"] if pointer else None
+
+
+# Semua key milik run terbaru (1 untuk json/csv, banyak untuk parquet berpartisi)
+def resolve_latest_keys(s3, bucket, prefix):
+    pointer = read_latest(s3, bucket, prefix)
+    if not pointer:
+        return []
+    return pointer.get("keys") or [pointer["key"]]
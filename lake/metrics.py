@@ -0,0 +1,391 @@
+import contextvars
+import cProfile
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Telemetri per stage (ingestor & processor), hanya stdlib + client boto3 yang
+# sudah ada, jadi aman di-import image ingestor yang tidak punya pandas.
+#   _metrics/<stage>/tanggal=YYYY-MM-DD/<stage>_YYYYMMDD_HHMMSS.json
+# Satu objek kecil per run (ingestor cron tiap menit) -> hari yang sudah lewat
+# digabung job compaction (processor/maintenance/compact.py)
+METRICS_PREFIX = "_metrics/"
+
+# METRICS_ENABLED=0 -> record tidak ditulis ke lake (ringkasan tetap dicetak)
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Direktori textfile collector node_exporter (kosong = tidak ditulis)
+TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR")
+
+# Profiling opt-in: METRICS_PROFILE=cprofile,tracemalloc
+# METRICS_PROFILE_STAGES=sql_cleaned,decision_binding (kosong = semua stage)
+PROFILE = {p.strip() for p in os.getenv("METRICS_PROFILE", "").split(",")} - {""}
+PROFILE_STAGES = {
+    s.strip() for s in os.getenv("METRICS_PROFILE_STAGES", "").split(",")
+} - {""}
+PROFILE_TOP = int(os.getenv("METRICS_PROFILE_TOP", "15"))
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_current = contextvars.ContextVar("lake_metrics_stage", default=None)
+
+# tracemalloc global per proses: stage paralel (runner pipeline) berbagi satu
+# sesi tracing, di-start pemakai pertama & di-stop pemakai terakhir
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_entries = 0
+_tracing_owned = False
+
+
+# COUNTER S3 lewat event hook botocore. attach() menerima event emitter client
+# (s3.meta.events) atau session (boto3.DEFAULT_SESSION.events)
+class S3Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._handlers = []
+
+    def attach(self, events):
+        uid = f"lake-metrics-{id(self)}"
+        for name, handler in (
+            ("before-send.s3", self.on_send),
+            ("after-call.s3.GetObject", self.on_get),
+        ):
+            events.register(name, handler, unique_id=f"{uid}-{name}")
+            self._handlers.append((events, name, f"{uid}-{name}"))
+        return self
+
+    def detach(self):
+        for events, name, uid in self._handlers:
+            events.unregister(name, unique_id=uid)
+        self._handlers = []
+
+    # Dipanggil tiap kirim HTTP (termasuk retry), body = byte yang di-upload
+    def on_send(self, request, **kwargs):
+        size = request_size(request)
+        with self.lock:
+            self.requests += 1
+            self.bytes_written += size
+
+    def on_get(self, parsed, **kwargs):
+        with self.lock:
+            self.bytes_read += parsed.get("ContentLength", 0) or 0
+
+    def snapshot(self):
+        with self.lock:
+            return self.requests, self.bytes_read, self.bytes_written
+
+
+# Upload lewat HTTPS dibungkus aws-chunked (checksum trailer): ukuran asli
+# hanya ada di header X-Amz-Decoded-Content-Length
+def request_size(request):
+    decoded = request.headers.get("X-Amz-Decoded-Content-Length")
+    return int(decoded) if decoded else body_size(request.body)
+
+
+def body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    if hasattr(body, "seek") and hasattr(body, "tell"):
+        pos = body.tell()
+        body.seek(0, os.SEEK_END)
+        size = body.tell() - pos
+        body.seek(pos)
+        return size
+    return 0
+
+
+# PEAK RSS: sampling /proc/self/statm (ru_maxrss = peak seumur proses, fallback)
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+# COUNTER S3 PER STAGE: satu hook per client (dipasang sekali, unique_id tetap)
+# yang menambah ke record stage di _current. Handler botocore jalan di thread
+# pemanggil, jadi stage paralel di satu client bersama tetap terhitung
+# terpisah; thread pool di dalam stage perlu copy_context() (lake/bulk.py)
+_count_lock = threading.Lock()
+_COUNT_ID = "lake-metrics-stage"
+
+
+def _count_send(request, **kwargs):
+    record = _current.get()
+    if record is not None:
+        size = request_size(request)
+        with _count_lock:
+            record["s3_requests"] += 1
+            record["s3_bytes_written"] += size
+
+
+def _count_get(parsed, **kwargs):
+    record = _current.get()
+    if record is not None:
+        with _count_lock:
+            record["s3_bytes_read"] += parsed.get("ContentLength", 0) or 0
+
+
+def count_stages(events):
+    events.register("before-send.s3", _count_send, unique_id=f"{_COUNT_ID}-send")
+    events.register("after-call.s3.GetObject", _count_get, unique_id=f"{_COUNT_ID}-get")
+
+
+# Dipanggil kode stage: baris masuk/keluar ditambahkan ke stage yang sedang
+# di-track di thread ini (no-op kalau stage jalan tanpa track)
+def add_rows(rows_in=0, rows_out=0):
+    record = _current.get()
+    if record is not None:
+        record["rows_in"] += int(rows_in)
+        record["rows_out"] += int(rows_out)
+
+
+def _profiled(stage, kind):
+    return kind in PROFILE and (not PROFILE_STAGES or stage in PROFILE_STAGES)
+
+
+def metrics_key(stage, started, ext="json"):
+    return (
+        f"{METRICS_PREFIX}{stage}/tanggal={started:%Y-%m-%d}/"
+        f"{stage}_{started:%Y%m%d_%H%M%S}.{ext}"
+    )
+
+
+# TRACK SATU STAGE: waktu, CPU, peak RSS, baris, request & byte S3 lewat client s3.
+# CPU & RSS dihitung per proses: kalau stage jalan paralel (pipeline) angkanya
+# ikut memuat stage lain yang overlap; request/byte S3 tetap per stage.
+@contextmanager
+def track(s3, bucket, stage):
+    started = datetime.now()
+    record = {
+        "stage": stage,
+        "status": "running",
+        "started_at": started.isoformat(),
+        "rows_in": 0,
+        "rows_out": 0,
+        "s3_requests": 0,
+        "s3_bytes_read": 0,
+        "s3_bytes_written": 0,
+    }
+    count_stages(s3.meta.events)
+    token = _current.set(record)
+
+    profiler = None
+    if _profiled(stage, "cprofile"):
+        profiler = cProfile.Profile()
+    traced = _profiled(stage, "tracemalloc")
+    if traced:
+        tracing = _enter_tracing()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        with RssSampler() as sampler:
+            if profiler:
+                profiler.enable()
+            try:
+                yield record
+            finally:
+                if profiler:
+                    profiler.disable()
+        record["status"] = "done"
+    except BaseException as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        record.update(
+            {
+                "finished_at": datetime.now().isoformat(),
+                "seconds": round(time.perf_counter() - wall_start, 4),
+                "cpu_seconds": round(time.process_time() - cpu_start, 4),
+                "peak_rss_bytes": sampler.peak,
+            }
+        )
+        if traced:
+            record.update(_exit_tracing(tracing))
+        _publish(s3, bucket, record, started, profiler)
+
+
+# Peak di-reset hanya kalau stage ini satu-satunya pemakai tracing
+def _enter_tracing():
+    global _tracing_users, _tracing_entries, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        alone = _tracing_users == 0
+        if alone:
+            tracemalloc.reset_peak()
+        _tracing_users += 1
+        _tracing_entries += 1
+        return {"alone": alone, "entry": _tracing_entries}
+
+
+# Stage lain sempat ikut tracing (overlap) -> peak tracemalloc tidak bisa
+# diatribusikan ke stage ini, dicatat None (pakai peak RSS)
+def _exit_tracing(tracing):
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        shared = not tracing["alone"] or _tracing_entries != tracing["entry"]
+        snapshot = tracemalloc.take_snapshot()
+        peak = None if shared else tracemalloc.get_traced_memory()[1]
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+    top = snapshot.statistics("lineno")[:PROFILE_TOP]
+    return {
+        "tracemalloc_peak_bytes": peak,
+        "tracemalloc_shared": shared,
+        "tracemalloc_top": [
+            {"where": str(stat.traceback), "size": stat.size, "count": stat.count}
+            for stat in top
+        ],
+    }
+
+
+# TULIS HASIL: gagal menulis metrics tidak boleh menggagalkan stage-nya
+def _publish(s3, bucket, record, started, profiler):
+    print(
+        f"📈 [{record['stage']}] {record['status']} {record['seconds']:.2f} s "
+        f"(cpu {record['cpu_seconds']:.2f} s, peak {record['peak_rss_bytes'] / 2**20:.0f} MB, "
+        f"rows {record['rows_in']} -> {record['rows_out']}, "
+        f"s3 {record['s3_requests']} req, "
+        f"R {record['s3_bytes_read'] / 2**20:.2f} MB / "
+        f"W {record['s3_bytes_written'] / 2**20:.2f} MB)"
+    )
+    try:
+        if ENABLED:
+            if profiler:
+                record["profile_key"] = metrics_key(record["stage"], started, "pstats")
+                s3.put_object(
+                    Bucket=bucket,
+                    Key=record["profile_key"],
+                    Body=_pstats_bytes(profiler),
+                    ContentType="application/octet-stream",
+                )
+            record["metrics_key"] = metrics_key(record["stage"], started)
+            s3.put_object(
+                Bucket=bucket,
+                Key=record["metrics_key"],
+                Body=json.dumps(record),
+                ContentType="application/json",
+            )
+        if TEXTFILE_DIR:
+            write_textfile(TEXTFILE_DIR, record)
+    except Exception as e:
+        print(f"⚠️ Metrics [{record['stage']}] gagal disimpan: {e}")
+
+
+def _pstats_bytes(profiler):
+    with tempfile.NamedTemporaryFile(suffix=".pstats") as tmp:
+        profiler.dump_stats(tmp.name)
+        return tmp.read()
+
+
+# PROMETHEUS TEXTFILE (node_exporter --collector.textfile.directory)
+TEXTFILE_METRICS = [
+    ("seconds", "sigma_stage_duration_seconds", "Durasi wall-clock stage"),
+    ("cpu_seconds", "sigma_stage_cpu_seconds", "CPU time proses selama stage"),
+    ("peak_rss_bytes", "sigma_stage_peak_rss_bytes", "Peak RSS proses selama stage"),
+    ("rows_in", "sigma_stage_rows_in", "Baris masuk"),
+    ("rows_out", "sigma_stage_rows_out", "Baris keluar"),
+    ("s3_requests", "sigma_stage_s3_requests", "Jumlah request S3"),
+    ("s3_bytes_read", "sigma_stage_s3_bytes_read", "Byte dibaca dari S3"),
+    ("s3_bytes_written", "sigma_stage_s3_bytes_written", "Byte ditulis ke S3"),
+]
+
+
+def write_textfile(directory, record):
+    stage = record["stage"]
+    values = [(name, text, record[field]) for field, name, text in TEXTFILE_METRICS]
+    values += [
+        (
+            "sigma_stage_success",
+            "1 kalau run terakhir sukses",
+            int(record["status"] == "done"),
+        ),
+        (
+            "sigma_stage_last_run_timestamp_seconds",
+            "Waktu selesai run",
+            round(time.time(), 3),
+        ),
+    ]
+    lines = []
+    for name, help_text, value in values:
+        lines += [
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} gauge",
+            f'{name}{{stage="{stage}"}} {value}',
+        ]
+
+    # Tulis ke file sementara lalu rename: collector tidak pernah baca setengah file
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"sigma_{stage}.prom")
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+    return path
+
+
+# RUN RECORD PIPELINE: ringkasan semua stage satu run runner
+def write_run(s3, bucket, name, started, status, stages):
+    record = {
+        "run": name,
+        "started_at": started.isoformat(),
+        "finished_at": datetime.now().isoformat(),
+        "status": status,
+        "stages": stages,
+    }
+    if not ENABLED:
+        return record
+    key = metrics_key(name, started)
+    try:
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=json.dumps(record),
+            ContentType="application/json",
+        )
+        print(f"📈 Run record tersimpan di {key}")
+    except Exception as e:
+        print(f"⚠️ Run record gagal disimpan: {e}")
+    return record
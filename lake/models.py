@@ -0,0 +1,91 @@
+import hashlib
+import json
+import pickle
+from datetime import datetime
+
+import pandas as pd
+import sklearn
+
+from lake.diskcache import read_object
+from lake.latest import read_latest, write_latest
+
+# Registry model: gold/models/<nama>/<nama>_<ts>.pkl + metadata .json di sebelahnya
+MODELS_PREFIX = "gold/models/"
+
+
+def model_prefix(name):
+    return f"{MODELS_PREFIX}{name}/"
+
+
+def sklearn_version():
+    return ".".join(sklearn.__version__.split(".")[:2])
+
+
+# Sidik jari data training: berubah kalau isi fitur/target berubah
+def fingerprint(df):
+    hashed = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+# SIMPAN MODEL + METADATA, lalu geser pointer _latest/gold/models/<nama>
+def register_model(
+    s3, bucket, name, model, features, target, metrics, df_train, **extra
+):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    model_key = f"{model_prefix(name)}{name}_{timestamp}.pkl"
+    meta_key = f"{model_prefix(name)}{name}_{timestamp}.json"
+
+    resp = s3.put_object(
+        Bucket=bucket,
+        Key=model_key,
+        Body=pickle.dumps(model),
+        ContentType="application/octet-stream",
+    )
+    meta = {
+        "name": name,
+        "model_key": model_key,
+        "model_etag": resp["ETag"],
+        "features": features,
+        "target": target,
+        "params": model.get_params(),
+        "classes": [c.item() if hasattr(c, "item") else c for c in model.classes_],
+        "metrics": metrics,
+        "train_rows": len(df_train),
+        "fingerprint": fingerprint(df_train[features + [target]]),
+        "sklearn_version": sklearn_version(),
+        "created_at": datetime.now().isoformat(),
+        **extra,
+    }
+    s3.put_object(
+        Bucket=bucket,
+        Key=meta_key,
+        Body=json.dumps(meta, default=str),
+        ContentType="application/json",
+    )
+    write_latest(s3, bucket, model_prefix(name), meta_key, model_key=model_key)
+    return meta
+
+
+# METADATA MODEL TERBARU (None kalau registry masih kosong)
+def latest_model_meta(s3, bucket, name):
+    pointer = read_latest(s3, bucket, model_prefix(name))
+    if not pointer:
+        return None
+    # Pointer hasil rebuild bisa menunjuk ke .pkl, metadata ada di sebelahnya
+    meta_key = pointer["key"].replace(".pkl", ".json")
+    body = read_object(s3, bucket, meta_key)
+    return json.loads(body)
+
+
+# Cocok kalau fitur sama persis & versi sklearn (major.minor) sama
+def is_compatible(meta, features):
+    return (
+        meta is not None
+        and meta.get("features") == features
+        and meta.get("sklearn_version") == sklearn_version()
+    )
+
+
+def load_model(s3, bucket, model_key):
+    body = read_object(s3, bucket, model_key)
+    return pickle.loads(body)
@@ -0,0 +1,77 @@
+import os
+
+# Part S3 minimal 5 MB (kecuali part terakhir)
+PART_SIZE = max(5 * 1024 * 1024, int(os.getenv("LAKE_PART_SIZE", 8 * 1024 * 1024)))
+
+
+# UPLOAD BERTAHAP: data di-buffer sampai PART_SIZE lalu dikirim sebagai satu part,
+# jadi memori maksimal ~PART_SIZE berapa pun total ukurannya.
+class MultipartWriter:
+    def __init__(self, s3, bucket, key, content_type, metadata=None):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.metadata = metadata or {}
+        self.upload_id = None
+        self.parts = []
+        self.buffer = bytearray()
+        self.bytes_written = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self.buffer) >= PART_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        if self.upload_id is None:
+            resp = self.s3.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ContentType=self.content_type,
+                Metadata=self.metadata,
+            )
+            self.upload_id = resp["UploadId"]
+        number = len(self.parts) + 1
+        resp = self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append({"PartNumber": number, "ETag": resp["ETag"]})
+        self.buffer.clear()
+
+    # Tidak ada data sama sekali -> tidak ada objek yang dibuat
+    def close(self):
+        self._flush()
+        if self.upload_id is None:
+            return None
+        return self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+            self.upload_id = None
+        self.buffer.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        return False
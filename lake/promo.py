@@ -0,0 +1,204 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+
+from lake.state import STATE_PREFIX
+
+# Pola noise halaman promo, dihapus BERURUTAN (urutan ikut menentukan hasil)
+NOISE_PATTERNS = [
+    r"lihat penawaran",
+    r"lihat kode promo",
+    r"lihat detail",
+    r"gunakan voucher",
+    r"syarat",
+    r"ketentuan",
+    r"arrow[- ]?forwardios",
+    r"arrow[- ]?forward",
+    r"diverifikasi",
+    r"offer verified",
+    r"los",
+]
+
+PROMO_KEYWORDS = ["diskon", "voucher", "cashback", "gratis", "ongkir", "promo", "off"]
+
+MIN_LENGTH = 20
+MAX_LENGTH = 600
+
+# Semua regex dikompilasi sekali. Teks ASCII dicocokkan pada versi lowercase-nya
+# tanpa IGNORECASE (jauh lebih cepat, posisi karakter tetap sama).
+_NOISE_ANY = re.compile("|".join(NOISE_PATTERNS), re.IGNORECASE)
+_NOISE_SEQ = [re.compile(p, re.IGNORECASE) for p in NOISE_PATTERNS]
+_NOISE_ANY_ASCII = re.compile("|".join(NOISE_PATTERNS))
+# (potongan literal di depan pola, pola): `in` jauh lebih murah dari finditer
+_NOISE_SEQ_ASCII = [
+    (re.match(r"[a-z ]+", p).group(), re.compile(p)) for p in NOISE_PATTERNS
+]
+_PUNCT = re.compile(r"[^\w\s%]")
+_SPACES = re.compile(r"\s+")
+_RP = re.compile(r"\brp\b", re.IGNORECASE)
+
+
+# Hapus match `pattern` (dicari di `lower`) dari text & lower sekaligus
+def _cut(text, lower, pattern):
+    parts, lower_parts, pos = [], [], 0
+    for match in pattern.finditer(lower):
+        start, end = match.span()
+        parts.append(text[pos:start])
+        lower_parts.append(lower[pos:start])
+        pos = end
+    if not pos:
+        return text, lower
+    parts.append(text[pos:])
+    lower_parts.append(lower[pos:])
+    return "".join(parts), "".join(lower_parts)
+
+
+def _strip_noise_ascii(text):
+    lower = text.lower()
+    if not _NOISE_ANY_ASCII.search(lower):
+        return text
+    for literal, pattern in _NOISE_SEQ_ASCII:
+        if literal in lower:
+            text, lower = _cut(text, lower, pattern)
+    return text
+
+
+def _strip_noise(text):
+    if not _NOISE_ANY.search(text):
+        return text
+    for pattern in _NOISE_SEQ:
+        text = pattern.sub("", text)
+    return text
+
+
+# CLEAN TEXT (TANPA LOWERCASE) -> (teks bersih, lowercase untuk filter)
+def clean_text_lower(text):
+    if text.isascii():
+        cleaned = " ".join(_PUNCT.sub(" ", _strip_noise_ascii(text)).split())
+        lower = cleaned.lower()
+        if "rp" in lower:
+            cleaned = _RP.sub("RP", cleaned)
+        return cleaned, lower
+
+    cleaned = _PUNCT.sub(" ", _strip_noise(text))
+    cleaned = _SPACES.sub(" ", cleaned).strip()
+    cleaned = _RP.sub("RP", cleaned)
+    return cleaned, cleaned.lower()
+
+
+def clean_text(text):
+    return clean_text_lower(text)[0]
+
+
+# Satu kali scan per keyword; hasilnya dipakai untuk filter & kata_kunci
+def match_keywords(text_lower):
+    return [k for k in PROMO_KEYWORDS if k in text_lower]
+
+
+# CLEAN + FILTER SATU BATCH ROW BRONZE -> ROW SILVER
+def clean_rows(rows, platforms):
+    cleaned_rows = []
+    append = cleaned_rows.append
+
+    for row in rows:
+        platform = row.get("platform")
+        if platform not in platforms:
+            continue
+
+        cleaned, text_lower = clean_text_lower(row.get("raw_text", ""))
+
+        if not MIN_LENGTH <= len(cleaned) <= MAX_LENGTH:
+            continue
+        if "food" not in text_lower:
+            continue
+        keywords = match_keywords(text_lower)
+        if not keywords:
+            continue
+
+        append(
+            {
+                "platform": platform,
+                "judul_promo": cleaned,
+                "kata_kunci": keywords,
+                "tanggal_scrape": row.get("scrape_date"),
+                "waktu_scrape": row.get("scrape_time"),
+                "source_url": row.get("source_url"),
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+
+    return cleaned_rows
+
+
+# INDEX IDENTITAS PROMO (lintas run)
+# promo_id = hash platform + judul_promo ternormalisasi; index menyimpan
+# first_seen/last_seen per promo + waktu run terakhir (last_run).
+INDEX_KEY = f"{STATE_PREFIX}promo_cleaned/index.json"
+INDEX_RETENTION_DAYS = 90
+
+# Status baris silver: "baru" & "kembali" = record lengkap, "aktif" = record ringkas
+STATUS_NEW = "baru"
+STATUS_RETURNED = "kembali"
+STATUS_ACTIVE = "aktif"
+ACTIVE_COLUMNS = ["promo_id", "platform", "tanggal_scrape", "waktu_scrape", "status"]
+
+
+def promo_id(platform, judul_promo):
+    normalized = " ".join(judul_promo.lower().split())
+    return hashlib.sha1(f"{platform}|{normalized}".encode("utf-8")).hexdigest()
+
+
+# DIFF TERHADAP INDEX -> (baris silver, index baru)
+# Promo yang juga ada di run sebelumnya cukup ditulis ringkas (status "aktif")
+def diff_promos(cleaned_rows, index, now=None):
+    now = now or datetime.now()
+    run_at = now.isoformat()
+    previous_run = index.get("last_run")
+    promos = dict(index.get("promos", {}))
+
+    silver_rows = []
+    seen = set()
+    for row in cleaned_rows:
+        pid = promo_id(row["platform"], row["judul_promo"])
+        if pid in seen:
+            continue
+        seen.add(pid)
+
+        entry = promos.get(pid)
+        if entry is None:
+            status = STATUS_NEW
+            entry = {"platform": row["platform"], "first_seen": run_at}
+        elif previous_run and entry.get("last_seen") == previous_run:
+            status = STATUS_ACTIVE
+        else:
+            status = STATUS_RETURNED
+        promos[pid] = dict(entry, last_seen=run_at)
+
+        record = dict(row, promo_id=pid, status=status)
+        if status == STATUS_ACTIVE:
+            record = {k: record.get(k) for k in ACTIVE_COLUMNS}
+        silver_rows.append(record)
+
+    cutoff = (now - timedelta(days=INDEX_RETENTION_DAYS)).isoformat()
+    promos = {k: v for k, v in promos.items() if v["last_seen"] >= cutoff}
+    return silver_rows, {"last_run": run_at, "promos": promos}
+
+
+# KETERSEDIAAN PROMO PER HARI (dari index identitas)
+# Run baru hanya ada kalau halaman promo berubah: hari yang semua route-nya 304
+# tidak punya baris silver sama sekali. Promo dianggap tayang dari first_seen
+# sampai last_seen; yang masih ada di run terakhir dibawa ke semua tanggal
+# sesudahnya sampai hilang dari run berikutnya.
+def active_per_day(index, dates):
+    last_run = index.get("last_run")
+    spans = [
+        (
+            entry["first_seen"][:10],
+            None if entry["last_seen"] == last_run else entry["last_seen"][:10],
+        )
+        for entry in index.get("promos", {}).values()
+    ]
+    return {
+        day: sum(start <= day and (end is None or day <= end) for start, end in spans)
+        for day in dates
+    }
@@ -0,0 +1,127 @@
+from itertools import product
+
+import pandas as pd
+
+from lake.features import scoring_frame
+
+# SKORING REKOMENDASI per mode, dipakai cube gold & dashboard (fallback live).
+# Cube: satu baris per warung, kolom prob/skor per konteks diskrit
+#   prob_h{hujan}l{lunch}t{takeaway}, skor_<mode>_h{hujan}l{lunch}t{takeaway}
+CUBE_PREFIX = "gold/recommendation/"
+
+MODES = {
+    "Seimbang (AI)": "seimbang",
+    "Sultan (Sepuasnya)": "sultan",
+    "Tanggal Tua (Hemat)": "hemat",
+    "Kepepet (Cepat)": "kepepet",
+}
+
+# (is_hujan, is_lunch_time, is_takeaway)
+CONTEXTS = list(product([0, 1], repeat=3))
+
+# Atribut warung yang ikut disimpan di cube (filter & tampilan dashboard)
+WARUNG_COLUMNS = [
+    "id_warung",
+    "nama_warung",
+    "kategori",
+    "harga_rata2",
+    "jarak_menit",
+    "indoor",
+    "pedas",
+    "jam_buka",
+    "jam_tutup",
+    "rating_rasa",
+    "porsi",
+    "waktu_saji",
+]
+
+
+def context_suffix(is_hujan, lunch, takeaway):
+    return f"h{int(is_hujan)}l{int(lunch)}t{int(takeaway)}"
+
+
+def prob_column(is_hujan, lunch, takeaway):
+    return f"prob_{context_suffix(is_hujan, lunch, takeaway)}"
+
+
+def score_column(mode, is_hujan, lunch, takeaway):
+    return f"skor_{MODES[mode]}_{context_suffix(is_hujan, lunch, takeaway)}"
+
+
+# Probabilitas kelas kedua model (model satu kelas -> 1.0)
+def predict_prob(model, inputs):
+    if inputs.empty:
+        return pd.Series(dtype=float, index=inputs.index)
+    if len(model.classes_) > 1:
+        return pd.Series(model.predict_proba(inputs)[:, 1], index=inputs.index)
+    return pd.Series(1.0, index=inputs.index)
+
+
+# SKOR SKENARIO (weighted scoring) dari probabilitas kepuasan
+def mode_score(mode, prob, warung):
+    harga = warung["harga_rata2"]
+    rasa = warung["rating_rasa"]
+    waktu = warung["waktu_saji"]
+    final_score = prob * 100  # Skala 0-100
+
+    # A. LOGIKA SULTAN (Rasa + Porsi)
+    if mode == "Sultan (Sepuasnya)":
+        score_rasa = (rasa / 5.0) * 60  # Bobot rasa dominan (60%)
+        final_score = (prob * 40) + score_rasa
+        top_tier = rasa >= 4.7
+        final_score = final_score.where(~top_tier, final_score + 15)
+
+    # B. LOGIKA TANGGAL TUA (Harga + Porsi)
+    # Harga 10rb dapet poin penuh, harga 50rb poin 0; AI cuma 30%, Harga 70%
+    elif mode == "Tanggal Tua (Hemat)":
+        price_sensitivity = (50000 - harga).clip(lower=0) / 500
+        final_score = (prob * 30) + price_sensitivity
+        kenyang = warung["porsi"].isin(["Besar", "Jumbo"]) & (harga <= 18000)
+        final_score = final_score.where(~kenyang, final_score + 20)
+
+    # C. LOGIKA KEPEPET (Waktu Saji), penalty untuk yang lama
+    elif mode == "Kepepet (Cepat)":
+        kilat = waktu <= 5
+        final_score = final_score.where(~kilat, final_score + 40)
+        sedang = ~kilat & (waktu <= 10)
+        final_score = final_score.where(~sedang, final_score + 20)
+        lama = waktu > 15
+        final_score = final_score.where(~lama, final_score - 50)
+
+    return final_score
+
+
+# Label di UI: (tag, mask) per mode
+def mode_tags(mode, warung):
+    harga = warung["harga_rata2"]
+    if mode == "Sultan (Sepuasnya)":
+        return [("TOP TIER ⭐", warung["rating_rasa"] >= 4.7)]
+    if mode == "Tanggal Tua (Hemat)":
+        kenyang = warung["porsi"].isin(["Besar", "Jumbo"]) & (harga <= 18000)
+        return [("HEMAT", harga <= 15000), ("KENYANG MAX", kenyang)]
+    if mode == "Kepepet (Cepat)":
+        return [("KILAT ⚡", warung["waktu_saji"] <= 5)]
+    return []
+
+
+# PROB + SKOR untuk tiap (konteks, mode); suhu & promo = kondisi terakhir di lake
+def score_warungs(model, warung, suhu, ada_promo, contexts=CONTEXTS, modes=MODES):
+    warung = warung.reset_index(drop=True)
+    columns = {}
+    for is_hujan, lunch, takeaway in contexts:
+        inputs = scoring_frame(
+            warung["harga_rata2"], is_hujan, suhu, ada_promo, lunch, takeaway
+        )
+        prob = predict_prob(model, inputs)
+        columns[prob_column(is_hujan, lunch, takeaway)] = prob
+        for mode in modes:
+            columns[score_column(mode, is_hujan, lunch, takeaway)] = mode_score(
+                mode, prob, warung
+            )
+    return pd.concat(
+        [
+            warung[[c for c in WARUNG_COLUMNS if c in warung.columns]],
+            pd.DataFrame(columns),
+        ],
+        axis=1,
+    )
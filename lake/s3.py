@@ -0,0 +1,36 @@
+import os
+
+import boto3
+from botocore.config import Config
+
+# Pool koneksi harus >= jumlah thread bulk fetch, kalau tidak thread saling antre
+POOL_SIZE = int(os.getenv("LAKE_POOL_SIZE", "32"))
+
+
+# MINIO CLIENT (dari ENV)
+def make_client(pool_size=POOL_SIZE):
+    return boto3.client(
+        "s3",
+        endpoint_url=os.getenv("MINIO_ENDPOINT"),
+        aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
+        aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
+        config=Config(
+            max_pool_connections=pool_size,
+            retries={"max_attempts": 5, "mode": "adaptive"},
+        ),
+    )
+
+
+# LIST SEMUA OBJEK DI PREFIX (PAGINATED, TIDAK MENTOK DI 1000 KEY)
+def list_objects(s3, bucket, prefix):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+# Hasil compaction disimpan di {prefix}_compacted/ (lihat lake.compaction)
+COMPACTED_DIR = "_compacted/"
+
+
+def is_compacted(key):
+    return f"/{COMPACTED_DIR}" in key
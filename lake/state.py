@@ -0,0 +1,26 @@
+import json
+from datetime import datetime
+
+from lake.diskcache import read_object
+
+# State kecil (watermark, checkpoint) disimpan sebagai JSON di _state/
+STATE_PREFIX = "_state/"
+
+
+def load_state(s3, bucket, key, default=None):
+    try:
+        body = read_object(s3, bucket, key)
+    except s3.exceptions.NoSuchKey:
+        return dict(default or {})
+    return json.loads(body)
+
+
+def save_state(s3, bucket, key, state):
+    state = dict(state, updated_at=datetime.now().isoformat())
+    s3.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(state),
+        ContentType="application/json",
+    )
+    return state
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# INDEX MASTER WARUNG (array numpy, dibangun sekali per objek/ETag):
+#   - sorted index untuk filter rentang (jarak_menit, harga_rata2, jam buka/tutup)
+#   - bitmap (np.packbits, 1 bit per warung) untuk kolom kategorikal
+# Kandidat = irisan bitmap semua filter, baris DataFrame baru diambil di akhir.
+RANGE_COLUMNS = ["jarak_menit", "harga_rata2"]
+BOOL_COLUMNS = ["indoor", "pedas"]
+CATEGORY_COLUMNS = ["porsi", "kategori"]
+
+JAM_RE = r"^\s*(\d{1,2})[:.](\d{2})"
+
+
+# "HH:MM" -> menit sejak tengah malam (NaN kalau kosong / tidak valid).
+# Di-parse per nilai unik (jam buka/tutup cuma sedikit variasinya)
+def jam_to_minutes(values):
+    codes, uniques = pd.factorize(values)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(JAM_RE)
+    minutes = (parts[0].astype(float) * 60 + parts[1].astype(float)).to_numpy()
+    return np.where(codes >= 0, minutes[codes], np.nan)
+
+
+# NILAI URUT + POSISI BARIS ASLINYA (NaN di akhir, tidak pernah lolos filter)
+class SortedIndex:
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.order = np.argsort(values, kind="stable").astype(np.int32)
+        self.values = values[self.order]
+        self.valid = int(np.count_nonzero(~np.isnan(values)))
+
+    def at_most(self, upper):
+        stop = np.searchsorted(self.values[: self.valid], upper, side="right")
+        return self.order[:stop]
+
+    def greater_than(self, lower):
+        start = np.searchsorted(self.values[: self.valid], lower, side="right")
+        return self.order[start : self.valid]
+
+
+class WarungIndex:
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self.size = len(self.frame)
+        self.all = self.bitmap(np.ones(self.size, dtype=bool))
+
+        self.ranges = {
+            col: SortedIndex(pd.to_numeric(self.frame[col], errors="coerce"))
+            for col in RANGE_COLUMNS
+            if col in self.frame.columns
+        }
+
+        # Bitmap per nilai; kolom boolean pakai truthiness (sama dengan .astype(bool))
+        self.bitmaps = {}
+        for col in BOOL_COLUMNS:
+            if col in self.frame.columns:
+                truthy = self.frame[col].astype(bool).to_numpy()
+                self.bitmaps[col] = {
+                    True: self.bitmap(truthy),
+                    False: self.bitmap(~truthy),
+                }
+        for col in CATEGORY_COLUMNS:
+            if col in self.frame.columns:
+                codes, uniques = pd.factorize(self.frame[col])
+                self.bitmaps[col] = {
+                    value: self.bitmap(codes == i) for i, value in enumerate(uniques)
+                }
+
+        # Jam buka: tutup <= buka = lewat tengah malam (00:00-00:00 = 24 jam),
+        # jam kosong/tidak valid = dianggap selalu buka
+        self.hours = None
+        if {"jam_buka", "jam_tutup"} <= set(self.frame.columns):
+            buka = jam_to_minutes(self.frame["jam_buka"])
+            tutup = jam_to_minutes(self.frame["jam_tutup"])
+            self.hours = {
+                "buka": SortedIndex(buka),
+                "tutup": SortedIndex(tutup),
+                "wraps": self.bitmap(tutup <= buka),
+                "unknown": self.bitmap(np.isnan(buka) | np.isnan(tutup)),
+            }
+
+    def __len__(self):
+        return self.size
+
+    def bitmap(self, mask):
+        return np.packbits(mask)
+
+    def from_positions(self, positions):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return self.bitmap(mask)
+
+    # nilai <= upper
+    def range_bitmap(self, col, upper):
+        return self.from_positions(self.ranges[col].at_most(upper))
+
+    # nilai kolom salah satu dari values
+    def match_bitmap(self, col, values):
+        result = np.zeros_like(self.all)
+        for value in values:
+            if value in self.bitmaps[col]:
+                result |= self.bitmaps[col][value]
+        return result
+
+    # buka <= t < tutup (atau t >= buka / t < tutup kalau lewat tengah malam)
+    def open_bitmap(self, t):
+        minute = t.hour * 60 + t.minute
+        opened = self.from_positions(self.hours["buka"].at_most(minute))
+        not_closed = self.from_positions(self.hours["tutup"].greater_than(minute))
+        wraps = self.hours["wraps"]
+        return (
+            (opened & not_closed & ~wraps)
+            | ((opened | not_closed) & wraps)
+            | self.hours["unknown"]
+        )
+
+    # POSISI KANDIDAT: filter yang None tidak dipakai
+    def candidates(
+        self,
+        max_jarak=None,
+        max_harga=None,
+        indoor=None,
+        pedas=None,
+        porsi=None,
+        kategori=None,
+        open_at=None,
+    ):
+        result = self.all.copy()
+        if max_jarak is not None:
+            result &= self.range_bitmap("jarak_menit", max_jarak)
+        if max_harga is not None:
+            result &= self.range_bitmap("harga_rata2", max_harga)
+        if indoor is not None:
+            result &= self.match_bitmap("indoor", [bool(indoor)])
+        if pedas is not None:
+            result &= self.match_bitmap("pedas", [bool(pedas)])
+        if porsi is not None:
+            result &= self.match_bitmap("porsi", porsi)
+        if kategori is not None:
+            result &= self.match_bitmap("kategori", kategori)
+        if open_at is not None and self.hours is not None:
+            result &= self.open_bitmap(open_at)
+        return np.flatnonzero(np.unpackbits(result, count=self.size))
+
+    def take(self, positions):
+        return self.frame.iloc[positions].reset_index(drop=True)
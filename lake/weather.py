@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+import pandas as pd
+
+from lake.bulk import fetch_many
+from lake.diskcache import read_object
+from lake.features import is_hujan
+from lake.formats import (
+    PARQUET_CONTENT_TYPE,
+    file_type_of,
+    parse_body,
+    partition_of,
+    to_parquet_bytes,
+)
+from lake.latest import resolve_latest
+from lake.s3 import list_objects
+from lake.state import STATE_PREFIX
+
+# Time-series cuaca: satu parquet per hari, baris urut timestamp
+#   silver/weather_ts/tanggal=YYYY-MM-DD/weather.parquet
+WEATHER_TS_PREFIX = "silver/weather_ts/"
+
+# Penanda backfill sekali dari silver/weather_cleaned (store tidak kosong bukan
+# berarti sudah lengkap: weather_cleaned bisa menulis observasi baru lebih dulu)
+BACKFILL_KEY = f"{STATE_PREFIX}weather_ts/backfill.json"
+
+WEATHER_CLEANED_PREFIX = "silver/weather_cleaned/"
+
+# Nilai kalau observasi cuaca tidak ada (join gold & kondisi sekarang)
+WEATHER_DEFAULTS = {"kondisi": "Unknown", "suhu": 30.0, "kelembapan": 70.0}
+
+
+def day_key(day):
+    return f"{WEATHER_TS_PREFIX}tanggal={day}/weather.parquet"
+
+
+def _prepare(df):
+    df = df.copy()
+    # isoformat() tanpa mikrodetik kalau nol -> format campur, parse sebagai ISO8601
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601").astype(
+        "datetime64[ns]"
+    )
+    return df
+
+
+# HARI YANG ADA DI STORE (1 key per hari, cukup listing)
+def store_days(s3, bucket):
+    days = {}
+    for obj in list_objects(s3, bucket, WEATHER_TS_PREFIX):
+        day = partition_of(obj["Key"]).get("tanggal")
+        if day:
+            days[day] = obj["Key"]
+    return days
+
+
+# TULIS / TAMBAH OBSERVASI: partisi harian di-merge, dedup per timestamp, diurutkan
+def append_observations(s3, bucket, df, existing_days=None):
+    if df.empty:
+        return []
+    df = _prepare(df)
+    if existing_days is None:
+        existing_days = store_days(s3, bucket)
+
+    keys = []
+    for day, part in df.groupby(df["timestamp"].dt.date.astype(str)):
+        key = day_key(day)
+        if day in existing_days:
+            body = read_object(s3, bucket, key)
+            part = pd.concat([_prepare(parse_body(body, "parquet")), part])
+        part = (
+            part.drop_duplicates("timestamp", keep="last")
+            .sort_values("timestamp")
+            .reset_index(drop=True)
+        )
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=to_parquet_bytes(part),
+            ContentType=PARQUET_CONTENT_TYPE,
+        )
+        keys.append(key)
+    return keys
+
+
+# BACA JENDELA [start, end] (date) SAJA, hasil urut timestamp
+def read_window(s3, bucket, start, end, columns=None, days=None):
+    if days is None:
+        days = store_days(s3, bucket)
+    wanted = [
+        key
+        for day, key in sorted(days.items())
+        if start.isoformat() <= day <= end.isoformat()
+    ]
+    fetched = fetch_many(
+        s3, bucket, wanted, lambda key, body: parse_body(body, "parquet", columns)
+    )
+    frames = [df for _, df in fetched if not df.empty]
+    if not frames:
+        return _prepare(pd.DataFrame(columns=columns or ["timestamp"]))
+    return _prepare(pd.concat(frames, ignore_index=True)).sort_values(
+        "timestamp", ignore_index=True
+    )
+
+
+def window_for(timestamps, margin_days=1):
+    margin = timedelta(days=margin_days)
+    return timestamps.min().date() - margin, timestamps.max().date() + margin
+
+
+# OBSERVASI TERBARU: objek _latest weather_cleaned, kalau pointer/silver belum
+# ada pakai baris terakhir hari terbaru di store. None = belum ada cuaca sama sekali
+def latest_observation(s3, bucket):
+    key = resolve_latest(s3, bucket, WEATHER_CLEANED_PREFIX)
+    if key:
+        df = parse_body(read_object(s3, bucket, key), file_type_of(key))
+    else:
+        days = store_days(s3, bucket)
+        if not days:
+            return None
+        df = parse_body(read_object(s3, bucket, days[max(days)]), "parquet")
+    if df.empty:
+        return None
+    return df.iloc[-1].to_dict()
+
+
+# KONDISI SEKARANG (is_hujan, suhu) untuk skoring rekomendasi
+def current_weather(s3, bucket):
+    observation = latest_observation(s3, bucket) or WEATHER_DEFAULTS
+    kondisi = pd.Series([observation.get("kondisi", WEATHER_DEFAULTS["kondisi"])])
+    suhu = pd.to_numeric(observation.get("suhu"), errors="coerce")
+    if pd.isna(suhu):
+        suhu = WEATHER_DEFAULTS["suhu"]
+    return int(is_hujan(kondisi).iloc[0]), float(suhu)
@@ -0,0 +1,87 @@
+import json
+from dotenv import load_dotenv
+
+import pandas as pd
+
+from lake.diskcache import read_object
+from lake.features import FEATURES_PREFIX, SERVING_FEATURES
+from lake.formats import file_type_of, parse_body
+from lake.latest import read_latest, resolve_latest_keys
+from lake.metrics import add_rows
+from lake.models import latest_model_meta, load_model
+from lake.recommendation import CONTEXTS, CUBE_PREFIX, MODES, score_warungs
+from lake.s3 import make_client
+from lake.weather import current_weather
+
+from gold.decision_binding import save_table
+
+# KONFIGURASI ENV & S3
+load_dotenv()
+
+BUCKET = "sigma-lake"
+MASTER_KEY = "silver/master/warung_cleaned.json"
+MODEL_NAME = "spk_tree"
+
+
+def read_frame(s3, key, columns=None, default="json"):
+    body = read_object(s3, BUCKET, key)
+    return parse_body(body, file_type_of(key, default), columns)
+
+
+# KONTEKS YANG TIDAK DIPILIH USER: suhu observasi cuaca terbaru & ada/tidaknya
+# promo (sama dengan yang dibaca dashboard)
+def load_context(s3):
+    pointer = read_latest(s3, BUCKET, FEATURES_PREFIX)
+    if not pointer:
+        raise ValueError("❌ Tabel fitur belum ada, jalankan decision_binding dulu")
+    _, suhu = current_weather(s3, BUCKET)
+
+    promo_keys = resolve_latest_keys(s3, BUCKET, "silver/promo_cleaned/")
+    ada_promo = int(
+        any(not read_frame(s3, key, ["platform"]).empty for key in promo_keys)
+    )
+    return pointer["key"], suhu, ada_promo
+
+
+# CUBE: semua warung x (hujan, lunch, takeaway) x 4 mode
+def main(s3=None):
+    s3 = s3 or make_client()
+    try:
+        s3.head_object(Bucket=BUCKET, Key=MASTER_KEY)
+    except s3.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+            raise
+        print(f"⏭️ {MASTER_KEY} belum ada, cube tidak dibuat")
+        return None
+
+    meta = latest_model_meta(s3, BUCKET, MODEL_NAME)
+    if meta is None or meta.get("features") != SERVING_FEATURES:
+        raise ValueError(f"❌ Model {MODEL_NAME} belum ada / fitur tidak cocok")
+    model = load_model(s3, BUCKET, meta["model_key"])
+
+    features_key, suhu, ada_promo = load_context(s3)
+    warung = pd.DataFrame(json.loads(read_object(s3, BUCKET, MASTER_KEY)))
+
+    print(
+        f"🧊 Membuat cube rekomendasi: {len(warung)} warung x {len(CONTEXTS)} "
+        f"konteks x {len(MODES)} mode (suhu {suhu:.1f}, promo {ada_promo})"
+    )
+    cube = score_warungs(model, warung, suhu, ada_promo)
+    # Kondisi pembuatan cube: dashboard memakai cube hanya kalau semuanya sama
+    cube_key = save_table(
+        s3,
+        CUBE_PREFIX,
+        "cube",
+        cube,
+        model_key=meta["model_key"],
+        features_key=features_key,
+        suhu=suhu,
+        ada_promo=ada_promo,
+    )
+    add_rows(len(warung), len(cube))
+    print(f"✅ Cube rekomendasi tersimpan di {cube_key}")
+    return cube_key
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+from dotenv import load_dotenv
+
+from lake.backfill import (
+    BACKFILL_WORKERS,
+    bump_latest,
+    in_order,
+    key_ts,
+    pending_objects,
+    run_parallel,
+    ts_datetime,
+)
+from lake.metrics import add_rows, track
+from lake.promo import INDEX_KEY, diff_promos
+from lake.s3 import make_client
+from lake.state import STATE_PREFIX, load_state, save_state
+from lake.weather import BACKFILL_KEY
+
+from silver import promo_cleaned, sql_cleaned, weather_cleaned
+
+# LOAD ENV
+load_dotenv()
+
+BUCKET = "sigma-lake"
+
+# Index promo untuk replay riwayat yang lebih tua dari run normal terakhir
+# (index utama tidak boleh mundur)
+REPLAY_INDEX_KEY = f"{STATE_PREFIX}backfill/promo_index.json"
+
+
+# Weather & SQL: tiap objek independen, worker langsung menulis silver
+def collect(results):
+    written, failed = [], 0
+    for _, result, error in results:
+        if error:
+            failed += 1
+            continue
+        add_rows(result["rows_in"], result["rows_out"])
+        written.append(result)
+    return written, failed
+
+
+def backfill_weather(s3, keys, workers):
+    # Time-series cuaca dibangun ulang gold dari seluruh silver. Ditandai SEBELUM
+    # silver ditulis, jadi crash di tengah backfill tetap memicu rebuild
+    save_state(s3, BUCKET, BACKFILL_KEY, {"done": False})
+    return collect(
+        run_parallel(weather_cleaned.backfill_object, keys, "weather", workers)
+    )
+
+
+def backfill_sql(s3, keys, workers):
+    return collect(run_parallel(sql_cleaned.backfill_object, keys, "sql", workers))
+
+
+# Promo: clean paralel, diff ke index + tulis silver urut waktu di proses ini
+def backfill_promo(s3, keys, workers):
+    live = load_state(s3, BUCKET, INDEX_KEY)
+    replay = load_state(s3, BUCKET, REPLAY_INDEX_KEY)
+    written = []
+
+    results = run_parallel(promo_cleaned.clean_object, keys, "promo", workers)
+    for key, result in in_order(results, keys):
+        run_at = ts_datetime(key_ts(key))
+        # Lebih baru dari run normal terakhir (processor sempat mati) -> index
+        # utama diteruskan; riwayat lama memakai index replay terpisah
+        if run_at.isoformat() > live.get("last_run", ""):
+            index_key, index = INDEX_KEY, live
+        else:
+            index_key = REPLAY_INDEX_KEY
+            index = replay if replay.get("last_run", "") < run_at.isoformat() else {}
+
+        cleaned = result["cleaned"]
+        silver_rows, index = diff_promos(cleaned, index, now=run_at)
+        output_key, output_keys = promo_cleaned.save_silver(
+            s3, silver_rows, key, result["rows_in"], len(cleaned)
+        )
+        index = save_state(s3, BUCKET, index_key, dict(index, source_bronze=key))
+        if index_key == INDEX_KEY:
+            live = index
+        else:
+            replay = index
+
+        add_rows(result["rows_in"], len(silver_rows))
+        written.append({"output_key": output_key, "keys": output_keys})
+    return written, len(keys) - len(written)
+
+
+STAGES = {
+    "weather": {
+        "module": weather_cleaned,
+        "silver_name": "weather_cleaned",
+        "run": backfill_weather,
+    },
+    "promo": {
+        "module": promo_cleaned,
+        "silver_name": "promo_cleaned",
+        "run": backfill_promo,
+    },
+    "sql": {
+        "module": sql_cleaned,
+        "silver_name": "sql_cleaned",
+        "run": backfill_sql,
+        # Part file ekstraksi paralel dibaca lewat manifest-nya
+        "accept": lambda key: sql_cleaned.BRONZE_TS_RE.search(key),
+    },
+}
+
+
+# YYYYMMDD atau YYYYMMDD_HHMM(SS) -> format key_ts
+def normalize_since(since):
+    if not since:
+        return None
+    return f"{since}_000000" if len(since) == 8 else since.ljust(15, "0")
+
+
+# Idempotent & bisa dilanjutkan: yang diproses hanya bronze tanpa silver
+# (nama silver = timestamp bronze), jadi run ulang setelah crash/gagal
+# melanjutkan sisanya dan objek yang sudah ada cukup ditimpa.
+def run_backfill(stages, since=None, workers=BACKFILL_WORKERS, dry_run=False):
+    s3 = make_client()
+    failed_total = 0
+    for name in stages:
+        stage = STAGES[name]
+        module = stage["module"]
+        keys = pending_objects(
+            s3,
+            BUCKET,
+            module.BRONZE_PREFIX,
+            module.SILVER_PREFIX,
+            stage["silver_name"],
+            since=since,
+            accept=stage.get("accept"),
+        )
+        print(f"🔎 [{name}] {len(keys)} objek bronze belum punya silver")
+        if not keys or dry_run:
+            continue
+
+        # Request S3 di proses worker tidak ikut terhitung metrics proses ini
+        with track(s3, BUCKET, f"backfill_{name}"):
+            written, failed = stage["run"](s3, keys, workers)
+
+        if written:
+            newest = max(written, key=lambda r: key_ts(r["output_key"]))
+            bump_latest(
+                s3,
+                BUCKET,
+                module.SILVER_PREFIX,
+                newest["output_key"],
+                newest["keys"],
+            )
+        failed_total += failed
+        print(
+            f"✅ [{name}] {len(written)} objek silver ditulis"
+            + (f", {failed} gagal/tertunda (jalankan ulang)" if failed else "")
+        )
+    return failed_total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill silver dari semua bronze yang belum diproses"
+    )
+    parser.add_argument("stages", nargs="*", help="hanya stage ini (default semua)")
+    parser.add_argument("--since", help="hanya bronze mulai YYYYMMDD[_HHMM]")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="hanya hitung objek yang tertunda"
+    )
+    args = parser.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"stage tidak dikenal: {', '.join(sorted(unknown))}")
+
+    failed = run_backfill(
+        args.stages or list(STAGES),
+        normalize_since(args.since),
+        args.workers,
+        args.dry_run,
+    )
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
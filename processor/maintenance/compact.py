@@ -0,0 +1,47 @@
+import os
+from dotenv import load_dotenv
+
+from lake.compaction import compact_prefix
+from lake.metrics import METRICS_PREFIX, track
+from lake.s3 import make_client
+
+# LOAD ENV
+load_dotenv()
+
+BUCKET = "sigma-lake"
+
+# Prefix berisi banyak objek kecil (1 objek per cron tick, termasuk record
+# metrics tiap run ingestor)
+COMPACT_PREFIXES = os.getenv(
+    "COMPACT_PREFIXES", f"bronze/weather/,silver/weather_cleaned/,{METRICS_PREFIX}"
+).split(",")
+COMPACT_PERIOD = os.getenv("COMPACT_PERIOD", "daily")  # daily / monthly
+COMPACT_FORMAT = os.getenv("COMPACT_FORMAT", "ndjson")  # ndjson / parquet
+
+# Kosong = sumber asli tidak pernah dihapus
+RETENTION_DAYS = os.getenv("COMPACT_RETENTION_DAYS")
+# Record metrics cuma telemetri: sumbernya langsung dihapus setelah digabung
+METRICS_RETENTION_DAYS = os.getenv("COMPACT_METRICS_RETENTION_DAYS", "0")
+
+
+def main(s3=None):
+    s3 = s3 or make_client()
+    for prefix in filter(None, (p.strip() for p in COMPACT_PREFIXES)):
+        days = METRICS_RETENTION_DAYS if prefix == METRICS_PREFIX else RETENTION_DAYS
+        retention = int(days) if days else None
+        objects = compact_prefix(
+            s3,
+            BUCKET,
+            prefix,
+            COMPACT_PERIOD,
+            COMPACT_FORMAT,
+            retention,
+            protect_latest=prefix != METRICS_PREFIX,
+        )
+        print(f"✅ {prefix}: {len(objects)} objek compacted")
+
+
+if __name__ == "__main__":
+    s3 = make_client()
+    with track(s3, BUCKET, "compact"):
+        main(s3)
@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from dotenv import load_dotenv
+
+from lake.features import FEATURES_PREFIX
+from lake.latest import pointer_key
+from lake.metrics import track, write_run
+from lake.models import model_prefix
+from lake.s3 import make_client
+from lake.state import STATE_PREFIX, load_state, save_state
+from lake.weather import WEATHER_CLEANED_PREFIX
+
+from gold import decision_binding, recommendation_cube
+from silver import master_warung_cleaned, promo_cleaned, sql_cleaned, weather_cleaned
+
+# LOAD ENV
+load_dotenv()
+
+BUCKET = "sigma-lake"
+STATE_KEY = f"{STATE_PREFIX}pipeline/fingerprints.json"
+
+# Stage silver yang tidak saling bergantung jalan paralel
+MAX_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+# DAG: bronze -> silver -> gold
+# inputs: key yang ETag-nya jadi sidik jari input stage. Prefix dengan pointer
+# _latest cukup dicek pointer-nya (pointer berganti tiap ada objek baru).
+STAGES = {
+    "weather_cleaned": {
+        "run": weather_cleaned.main,
+        "deps": [],
+        "inputs": [pointer_key("bronze/weather/")],
+    },
+    "sql_cleaned": {
+        "run": sql_cleaned.main,
+        "deps": [],
+        "inputs": [pointer_key("bronze/sql/")],
+    },
+    "promo_cleaned": {
+        "run": promo_cleaned.main,
+        "deps": [],
+        "inputs": [pointer_key("bronze/promo/")],
+    },
+    "master_warung_cleaned": {
+        "run": master_warung_cleaned.clean_master,
+        "deps": [],
+        "inputs": [master_warung_cleaned.SOURCE_KEY],
+        # CSV master di-upload manual, belum ada = tidak ada yang dibersihkan
+        "optional": True,
+    },
+    "decision_binding": {
+        "run": decision_binding.main,
+        "deps": ["weather_cleaned", "sql_cleaned", "promo_cleaned"],
+        "inputs": [
+            pointer_key("silver/weather_cleaned/"),
+            pointer_key("silver/sql_cleaned/"),
+            pointer_key("silver/promo_cleaned/"),
+        ],
+    },
+    "recommendation_cube": {
+        "run": recommendation_cube.main,
+        "deps": ["decision_binding", "master_warung_cleaned", "weather_cleaned"],
+        "inputs": [
+            pointer_key(FEATURES_PREFIX),
+            pointer_key(model_prefix(recommendation_cube.MODEL_NAME)),
+            recommendation_cube.MASTER_KEY,
+            pointer_key("silver/promo_cleaned/"),
+            pointer_key(WEATHER_CLEANED_PREFIX),
+        ],
+    },
+}
+
+
+# SIDIK JARI INPUT: HEAD tiap key, key yang belum ada dicatat sebagai None
+def fingerprint(s3, keys):
+    etags = {}
+    for key in keys:
+        try:
+            etags[key] = s3.head_object(Bucket=BUCKET, Key=key)["ETag"]
+        except s3.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                raise
+            etags[key] = None
+    digest = hashlib.sha256(json.dumps(etags, sort_keys=True).encode()).hexdigest()
+    return digest, etags
+
+
+def run_stage(s3, name, stage, state, force, metrics):
+    digest, etags = fingerprint(s3, stage["inputs"])
+    if stage.get("optional") and not any(etags.values()):
+        print(f"⏭️ [{name}] input belum ada, skip")
+        return "skipped", None
+
+    previous = state.get(name, {})
+    if not force and previous.get("fingerprint") == digest:
+        print(f"⏭️ [{name}] input tidak berubah, skip")
+        return "skipped", None
+
+    print(f"▶️ [{name}] mulai")
+    started = datetime.now()
+    # Client bersama (satu pool koneksi); request S3 diatribusikan ke stage
+    # lewat context thread stage (lake/metrics.py)
+    with track(s3, BUCKET, name) as metrics[name]:
+        stage["run"](s3)
+    # Sidik jari diambil SEBELUM stage jalan: input yang masuk selama stage
+    # berjalan tetap memicu run berikutnya
+    return "done", {
+        "fingerprint": digest,
+        "inputs": etags,
+        "seconds": round((datetime.now() - started).total_seconds(), 3),
+        "finished_at": datetime.now().isoformat(),
+    }
+
+
+# RUNNER: stage dijalankan begitu semua dependensinya selesai (done/skipped)
+def run_pipeline(selected=None, force=False):
+    s3 = make_client()
+    started = datetime.now()
+    state = load_state(s3, BUCKET, STATE_KEY)
+    stages = {n: s for n, s in STAGES.items() if not selected or n in selected}
+
+    status = {}
+    metrics = {}
+    pending = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                deps = [d for d in stage["deps"] if d in stages]
+                if any(status.get(d) in ("failed", "blocked") for d in deps):
+                    print(f"⛔ [{name}] dilewati, dependensi gagal")
+                    status[name] = "blocked"
+                    del pending[name]
+                elif all(status.get(d) in ("done", "skipped") for d in deps):
+                    future = pool.submit(
+                        run_stage, s3, name, stage, state, force, metrics
+                    )
+                    running[future] = name
+                    del pending[name]
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    status[name], record = future.result()
+                except Exception as e:
+                    print(f"❌ [{name}] gagal: {e}")
+                    status[name] = "failed"
+                    continue
+                if record:
+                    state[name] = record
+                    # Disimpan per stage: gagal di gold tidak mengulang silver
+                    save_state(s3, BUCKET, STATE_KEY, state)
+
+    print("📋 Ringkasan: " + ", ".join(f"{n}={s}" for n, s in status.items()))
+    failed = any(s in ("failed", "blocked") for s in status.values())
+    write_run(
+        s3,
+        BUCKET,
+        "pipeline",
+        started,
+        "failed" if failed else "done",
+        [dict(metrics.get(n, {}), stage=n, result=s) for n, s in status.items()],
+    )
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan pipeline silver -> gold")
+    parser.add_argument("stages", nargs="*", help="hanya stage ini (default semua)")
+    parser.add_argument(
+        "--force", action="store_true", help="abaikan sidik jari, jalankan semua"
+    )
+    args = parser.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"stage tidak dikenal: {', '.join(sorted(unknown))}")
+
+    force = args.force or os.getenv("PIPELINE_FORCE", "0") == "1"
+    status = run_pipeline(args.stages or None, force)
+    if any(s in ("failed", "blocked") for s in status.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
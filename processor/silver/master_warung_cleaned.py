@@ -5,26 +5,32 @@ import io
 import json
 from dotenv import load_dotenv
 
-load_dotenv()
+from lake.diskcache import read_object
+from lake.metrics import add_rows
 
-# Config MinIO Internal Docker
-s3 = boto3.client(
-    "s3",
-    endpoint_url="http://minio:9000",
-    aws_access_key_id="admin",
-    aws_secret_access_key="admin123",
-)
+load_dotenv()
 
 BUCKET = "sigma-lake"
 SOURCE_KEY = "bronze/master/master_warung.csv"
 OUTPUT_KEY = "silver/master/warung_cleaned.json"
 
 
-def clean_master():
+# Config MinIO Internal Docker
+def make_docker_client():
+    return boto3.client(
+        "s3",
+        endpoint_url="http://minio:9000",
+        aws_access_key_id="admin",
+        aws_secret_access_key="admin123",
+    )
+
+
+# Runner (processor/pipeline.py) mengirim client bersama
+def clean_master(s3=None):
+    s3 = s3 or make_docker_client()
     print("🧹 Cleaning Master Warung (V2 - Atribut Baru)...")
 
-    obj = s3.get_object(Bucket=BUCKET, Key=SOURCE_KEY)
-    df = pd.read_csv(io.BytesIO(obj["Body"].read()))
+    df = pd.read_csv(io.BytesIO(read_object(s3, BUCKET, SOURCE_KEY)))
 
     # 1. Boolean Conversion
     bool_cols = ["indoor", "pedas"]
@@ -51,6 +57,7 @@ def clean_master():
         Body=json.dumps(json_data),
         ContentType="application/json",
     )
+    add_rows(len(df), len(df))
     print(f"✅ Master V2 Saved! ({len(df)} rows)")
 
 
@@ -1,10 +1,17 @@
-import boto3
+import pandas as pd
 import json
-import os
-import re
 from datetime import datetime
 from dotenv import load_dotenv
 
+from lake.backfill import key_stamp
+from lake.diskcache import read_object
+from lake.formats import LAKE_FORMAT, write_partitioned
+from lake.latest import resolve_latest, write_latest
+from lake.metrics import add_rows
+from lake.promo import INDEX_KEY, STATUS_ACTIVE, clean_rows, diff_promos
+from lake.s3 import make_client
+from lake.state import load_state, save_state
+
 # LOAD ENV
 load_dotenv()
 
@@ -14,111 +21,99 @@ SILVER_PREFIX = "silver/promo_cleaned/"
 
 VALID_PLATFORMS = {"GoJek", "Grab", "Shopee"}
 
-PROMO_KEYWORDS = ["diskon", "voucher", "cashback", "gratis", "ongkir", "promo", "off"]
-
-# MINIO CLIENT
-s3 = boto3.client(
-    "s3",
-    endpoint_url=os.getenv("MINIO_ENDPOINT"),
-    aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
-    aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
-)
-
-
-# CLEAN TEXT (TANPA LOWERCASE)
-def clean_text(text: str) -> str:
-    noise_patterns = [
-        r"lihat penawaran",
-        r"lihat kode promo",
-        r"lihat detail",
-        r"gunakan voucher",
-        r"syarat",
-        r"ketentuan",
-        r"arrow[- ]?forwardios",
-        r"arrow[- ]?forward",
-        r"diverifikasi",
-        r"offer verified",
-        r"los",
-    ]
-
-    cleaned = text  # ❗ TIDAK lower
-    for pattern in noise_patterns:
-        cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE)
-
-    cleaned = re.sub(r"[^\w\s%]", " ", cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
 
-    # Optional: rapikan RP
-    cleaned = re.sub(r"\brp\b", "RP", cleaned, flags=re.IGNORECASE)
-
-    return cleaned
+# SAVE SILVER (nama mengikuti timestamp bronze -> rerun/backfill menimpa)
+def save_silver(s3, silver_rows, source_key, total_raw, total_cleaned):
+    stamp = key_stamp(source_key) or datetime.now().strftime("%Y%m%d_%H%M")
+    name = f"promo_cleaned_{stamp}"
+
+    if LAKE_FORMAT == "parquet":
+        keys = write_partitioned(
+            s3,
+            BUCKET,
+            SILVER_PREFIX,
+            pd.DataFrame(silver_rows),
+            "tanggal_scrape",
+            name,
+        )
+        return keys[-1], keys
+
+    output_key = f"{SILVER_PREFIX}{name}.json"
+    output = {
+        "source_bronze": source_key,
+        "total_raw": total_raw,
+        "total_cleaned": total_cleaned,
+        "total_promo": len(silver_rows),
+        "total_aktif": sum(r["status"] == STATUS_ACTIVE for r in silver_rows),
+        "data": silver_rows,
+    }
+
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=output_key,
+        Body=json.dumps(output, ensure_ascii=False),
+        ContentType="application/json",
+    )
+    return output_key, [output_key]
 
 
-# LOAD LATEST BRONZE
-objects = s3.list_objects_v2(Bucket=BUCKET, Prefix=BRONZE_PREFIX).get("Contents", [])
+# BACKFILL (processor/maintenance/backfill.py): bagian CPU-bound saja (parse +
+# clean). Diff ke index promo harus urut waktu, jadi dikerjakan proses induk.
+def clean_object(s3, key):
+    raw = json.loads(read_object(s3, BUCKET, key))
+    rows = raw.get("data", [])
+    return {"rows_in": len(rows), "cleaned": clean_rows(rows, VALID_PLATFORMS)}
 
-if not objects:
-    raise RuntimeError("❌ Tidak ada data promo bronze")
 
-latest_key = sorted(objects, key=lambda x: x["LastModified"], reverse=True)[0]["Key"]
+# Dipanggil runner (processor/pipeline.py) dengan client bersama
+def main(s3=None):
+    s3 = s3 or make_client()
 
-raw = json.loads(s3.get_object(Bucket=BUCKET, Key=latest_key)["Body"].read())
+    # LOAD LATEST BRONZE
+    latest_key = resolve_latest(s3, BUCKET, BRONZE_PREFIX)
 
-rows = raw.get("data", [])
+    if not latest_key:
+        raise RuntimeError("❌ Tidak ada data promo bronze")
 
-print(f"📥 RAW ROWS: {len(rows)}")
+    # Silver dinamai dari bronze: bronze yang sama diproses ulang akan menimpa
+    # record lengkap dengan status "aktif", jadi dilewati
+    promo_index = load_state(s3, BUCKET, INDEX_KEY)
+    if promo_index.get("source_bronze") == latest_key:
+        print(f"⏭️ {latest_key} sudah diproses, skip")
+        return
 
-# CLEAN + FILTER (SILVER)
-cleaned_rows = []
+    raw = json.loads(read_object(s3, BUCKET, latest_key))
 
-for row in rows:
-    platform = row.get("platform")
-    raw_text = row.get("raw_text", "")
+    rows = raw.get("data", [])
 
-    if platform not in VALID_PLATFORMS:
-        continue
+    print(f"📥 RAW ROWS: {len(rows)}")
 
-    cleaned = clean_text(raw_text)
-    text_lower = cleaned.lower()  # ✅ hanya untuk filter
+    # CLEAN + FILTER (SILVER)
+    cleaned_rows = clean_rows(rows, VALID_PLATFORMS)
 
-    if "food" not in text_lower:
-        continue
+    # DEDUP LINTAS RUN: record lengkap hanya untuk promo baru / muncul kembali
+    silver_rows, promo_index = diff_promos(cleaned_rows, promo_index)
+    total_active = sum(r["status"] == STATUS_ACTIVE for r in silver_rows)
 
-    if not any(k in text_lower for k in PROMO_KEYWORDS):
-        continue
+    # SAVE SILVER
+    output_key, keys = save_silver(
+        s3, silver_rows, latest_key, len(rows), len(cleaned_rows)
+    )
+    write_latest(
+        s3, BUCKET, SILVER_PREFIX, output_key, keys=keys, source_bronze=latest_key
+    )
 
-    if len(cleaned) < 20 or len(cleaned) > 600:
-        continue
+    # Index baru disimpan SETELAH silver tersimpan
+    save_state(s3, BUCKET, INDEX_KEY, dict(promo_index, source_bronze=latest_key))
+    add_rows(len(rows), len(silver_rows))
 
-    cleaned_rows.append(
-        {
-            "platform": platform,
-            "judul_promo": cleaned,
-            "kata_kunci": [k for k in PROMO_KEYWORDS if k in text_lower],
-            "tanggal_scrape": row.get("scrape_date"),
-            "waktu_scrape": row.get("scrape_time"),
-            "source_url": row.get("source_url"),
-            "timestamp": datetime.now().isoformat(),
-        }
+    print("✅ SILVER promo cleaned saved")
+    print(f"📊 CLEANED: {len(cleaned_rows)}")
+    print(
+        f"🆔 PROMO UNIK: {len(silver_rows)} "
+        f"({len(silver_rows) - total_active} baru/kembali, {total_active} masih aktif)"
     )
 
-# SAVE SILVER
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-output_key = f"{SILVER_PREFIX}promo_cleaned_{timestamp}.json"
-
-output = {
-    "source_bronze": latest_key,
-    "total_raw": len(rows),
-    "total_cleaned": len(cleaned_rows),
-    "data": cleaned_rows,
-}
-
-s3.put_object(
-    Bucket=BUCKET,
-    Key=output_key,
-    Body=json.dumps(output, ensure_ascii=False),
-    ContentType="application/json",
-)
-
-print("✅ SILVER promo cleaned saved")
-print(f"📊 CLEANED: {len(cleaned_rows)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,274 @@
-import boto3
 import pandas as pd
+import io
 import json
 import os
-from datetime import datetime
+import re
 from dotenv import load_dotenv
 
+from lake.bulk import fetch_many
+from lake.diskcache import open_object, read_object
+from lake.formats import LAKE_FORMAT, NDJSON_CONTENT_TYPE, write_partitioned
+from lake.latest import write_latest
+from lake.metrics import add_rows
+from lake.multipart import MultipartWriter
+from lake.s3 import list_objects, make_client
+from lake.state import STATE_PREFIX, load_state, save_state
+
 # LOAD ENV
 load_dotenv()
 
 BUCKET = "sigma-lake"
 BRONZE_PREFIX = "bronze/sql/"
 SILVER_PREFIX = "silver/sql_cleaned/"
+STATE_KEY = f"{STATE_PREFIX}sql_cleaned/state.json"
+
+# Objek bronze: satu CSV, atau manifest hasil ekstraksi paralel (part file-nya
+# sendiri tidak cocok dengan pola ini, jadi tidak diproses terpisah)
+BRONZE_TS_RE = re.compile(r"_(\d{8}_\d{4,6})\.(?:csv|manifest\.json)$")
+
+# MODE: stream (default, CSV diproses per chunk, memori ~ 1 chunk + 1 part upload)
+# atau batch (seluruh bronze dibaca sekaligus, output JSON satu dokumen)
+CLEAN_MODE = os.getenv("SQL_CLEAN_MODE", "stream")
+CHUNK_ROWS = int(os.getenv("SQL_CLEAN_CHUNK_ROWS", "100000"))
+
+# dtype eksplisit supaya tipe kolom sama di semua chunk. Angka dibaca sebagai
+# teks dulu: nilai rusak di-coerce clean_sql, bukan menggagalkan read_csv
+BRONZE_DTYPES = {
+    "id_makan": "Int64",
+    "tanggal": str,
+    "waktu": str,
+    "nama_warung": str,
+    "menu": str,
+    "kategori": str,
+    "harga": str,
+    "metode": str,
+    "kepuasan": str,
+}
+
+
+# Timestamp di nama bronze (full: _HHMM, delta: _HHMMSS) -> bisa diurutkan
+def bronze_ts(key):
+    match = BRONZE_TS_RE.search(key)
+    return match.group(1).ljust(15, "0") if match else ""
 
-# MINIO CLIENT
-s3 = boto3.client(
-    "s3",
-    endpoint_url=os.getenv("MINIO_ENDPOINT"),
-    aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
-    aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
-)
 
-# LOAD LATEST BRONZE CSV
-objects = s3.list_objects_v2(Bucket=BUCKET, Prefix=BRONZE_PREFIX).get("Contents", [])
+# Full snapshot (export lama & --full-refresh) berisi semua baris tabel
+def is_full_snapshot(key):
+    return "_raw_" in key.rsplit("/", 1)[-1]
 
-if not objects:
-    raise RuntimeError("❌ Tidak ada data SQL bronze")
 
-latest_key = sorted(objects, key=lambda x: x["LastModified"], reverse=True)[0]["Key"]
+# BRONZE YANG BELUM DIPROSES, urut waktu: semua delta/full setelah key terakhir
+# di state. Tanpa state (run pertama): mulai dari full snapshot terakhir,
+# atau semua bronze kalau belum pernah ada full (delta pertama = semua baris)
+def pending_bronze_keys(s3, last_key):
+    keys = sorted(
+        (
+            obj["Key"]
+            for obj in list_objects(s3, BUCKET, BRONZE_PREFIX)
+            if BRONZE_TS_RE.search(obj["Key"])
+        ),
+        key=bronze_ts,
+    )
+    if last_key:
+        last_ts = bronze_ts(last_key)
+        return [k for k in keys if bronze_ts(k) > last_ts]
 
-obj = s3.get_object(Bucket=BUCKET, Key=latest_key)
-df = pd.read_csv(obj["Body"])
+    fulls = [i for i, k in enumerate(keys) if is_full_snapshot(k)]
+    return keys[fulls[-1] :] if fulls else keys
+
+
+# BACA BRONZE: manifest paralel -> gabungan semua part sebagai satu snapshot
+def read_bronze(s3, key):
+    body = read_object(s3, BUCKET, key)
+    if not key.endswith(".manifest.json"):
+        return pd.read_csv(io.BytesIO(body))
+
+    parts = json.loads(body)["parts"]
+    fetched = fetch_many(
+        s3, BUCKET, parts, lambda part_key, b: pd.read_csv(io.BytesIO(b))
+    )
+    if len(fetched) != len(parts):
+        raise RuntimeError(f"❌ Part bronze {key} tidak lengkap")
+    return pd.concat([df for _, df in fetched], ignore_index=True)
+
+
+# BACA BRONZE PER CHUNK: body S3 di-stream, manifest -> part dibaca berurutan
+def iter_bronze_chunks(s3, key):
+    if key.endswith(".manifest.json"):
+        body = read_object(s3, BUCKET, key)
+        part_keys = json.loads(body)["parts"]
+    else:
+        part_keys = [key]
+
+    for part_key in part_keys:
+        with open_object(s3, BUCKET, part_key) as body:
+            yield from pd.read_csv(body, dtype=BRONZE_DTYPES, chunksize=CHUNK_ROWS)
 
-print(f"📥 RAW ROWS: {len(df)}")
 
 # CLEANING
+def clean_sql(df):
+    # waktu → ambil HH:MM:SS saja
+    df["waktu"] = df["waktu"].astype(str).str.extract(r"(\d{2}:\d{2}:\d{2})")
 
-# waktu → ambil HH:MM:SS saja
-df["waktu"] = df["waktu"].astype(str).str.extract(r"(\d{2}:\d{2}:\d{2})")
+    # trim text
+    df["nama_warung"] = df["nama_warung"].str.strip().str.title()
+    df["menu"] = df["menu"].str.strip()
+    df["kategori"] = df["kategori"].str.strip().str.title()
 
-# trim text
-df["nama_warung"] = df["nama_warung"].str.strip().str.title()
-df["menu"] = df["menu"].str.strip()
-df["kategori"] = df["kategori"].str.strip().str.title()
+    # metode → normalisasi
+    df["metode"] = (
+        df["metode"]
+        .str.strip()
+        .str.lower()
+        .replace({"dine in": "dine-in", "dine-in": "dine-in"})
+    )
 
-# metode → normalisasi
-df["metode"] = (
-    df["metode"]
-    .str.strip()
-    .str.lower()
-    .replace({"dine in": "dine-in", "dine-in": "dine-in"})
-)
+    # harga & kepuasan
+    df["harga"] = pd.to_numeric(df["harga"], errors="coerce")
+    df["kepuasan"] = pd.to_numeric(df["kepuasan"], errors="coerce")
 
-# harga & kepuasan
-df["harga"] = pd.to_numeric(df["harga"], errors="coerce")
-df["kepuasan"] = pd.to_numeric(df["kepuasan"], errors="coerce")
+    # drop baris rusak
+    df = df.dropna(subset=["tanggal", "waktu", "harga", "kepuasan"])
 
-# drop baris rusak
-df = df.dropna(subset=["tanggal", "waktu", "harga", "kepuasan"])
+    df["harga"] = df["harga"].astype(int)
+    df["kepuasan"] = df["kepuasan"].astype(int)
+    return df
 
-df["harga"] = df["harga"].astype(int)
-df["kepuasan"] = df["kepuasan"].astype(int)
 
-# SAVE SILVER
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-output_key = f"{SILVER_PREFIX}sql_cleaned_{timestamp}.json"
+# SAVE SILVER (nama mengikuti timestamp bronze -> rerun menimpa, bukan menggandakan)
+def save_silver(s3, df, source_key, total_raw):
+    name = f"sql_cleaned_{bronze_ts(source_key)}"
 
-output = {
-    "source_bronze": latest_key,
-    "total_raw": len(df),
-    "data": df.to_dict(orient="records"),
-}
+    if LAKE_FORMAT == "parquet":
+        keys = write_partitioned(s3, BUCKET, SILVER_PREFIX, df, "tanggal", name)
+        output_key = keys[-1]
+    else:
+        output_key = f"{SILVER_PREFIX}{name}.json"
+        keys = [output_key]
+
+        output = {
+            "source_bronze": source_key,
+            "total_raw": total_raw,
+            "data": df.to_dict(orient="records"),
+        }
+
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=output_key,
+            Body=json.dumps(output, ensure_ascii=False),
+            ContentType="application/json",
+        )
+    write_latest(
+        s3, BUCKET, SILVER_PREFIX, output_key, keys=keys, source_bronze=source_key
+    )
+    return output_key
+
+
+# STREAM SILVER: json -> satu NDJSON lewat multipart upload,
+# parquet -> part per chunk ({name}_partNNNNN.parquet) di tiap partisi tanggal
+def stream_silver(s3, source_key, latest=True):
+    name = f"sql_cleaned_{bronze_ts(source_key)}"
+    total_raw, total_clean = 0, 0
+
+    if LAKE_FORMAT == "parquet":
+        keys = []
+        for i, chunk in enumerate(iter_bronze_chunks(s3, source_key)):
+            total_raw += len(chunk)
+            chunk = clean_sql(chunk)
+            total_clean += len(chunk)
+            if not chunk.empty:
+                keys += write_partitioned(
+                    s3, BUCKET, SILVER_PREFIX, chunk, "tanggal", f"{name}_part{i:05d}"
+                )
+        if not keys:
+            keys = write_partitioned(
+                s3, BUCKET, SILVER_PREFIX, pd.DataFrame(), "tanggal", name
+            )
+        output_key = keys[-1]
+    else:
+        output_key = f"{SILVER_PREFIX}{name}.ndjson"
+        keys = [output_key]
+        with MultipartWriter(
+            s3,
+            BUCKET,
+            output_key,
+            NDJSON_CONTENT_TYPE,
+            metadata={"source-bronze": source_key},
+        ) as writer:
+            for chunk in iter_bronze_chunks(s3, source_key):
+                total_raw += len(chunk)
+                chunk = clean_sql(chunk)
+                total_clean += len(chunk)
+                if not chunk.empty:
+                    lines = chunk.to_json(
+                        orient="records", lines=True, force_ascii=False
+                    )
+                    writer.write(lines if lines.endswith("\n") else lines + "\n")
+            uploaded = writer.close()
+        if uploaded is None:
+            # Tetap tulis objek kosong supaya run ini tercatat
+            s3.put_object(
+                Bucket=BUCKET,
+                Key=output_key,
+                Body=b"",
+                ContentType=NDJSON_CONTENT_TYPE,
+            )
+
+    if latest:
+        write_latest(
+            s3,
+            BUCKET,
+            SILVER_PREFIX,
+            output_key,
+            keys=keys,
+            source_bronze=source_key,
+            total_raw=total_raw,
+            rows=total_clean,
+        )
+    return output_key, keys, total_raw, total_clean
+
+
+# BACKFILL (processor/maintenance/backfill.py): satu bronze -> silver tanpa
+# pointer & checkpoint, memori per worker tetap dibatasi chunk
+def backfill_object(s3, key):
+    output_key, keys, total_raw, total_clean = stream_silver(s3, key, latest=False)
+    return {
+        "output_key": output_key,
+        "keys": keys,
+        "rows_in": total_raw,
+        "rows_out": total_clean,
+    }
+
+
+# Dipanggil runner (processor/pipeline.py) dengan client bersama
+def main(s3=None):
+    s3 = s3 or make_client()
+    state = load_state(s3, BUCKET, STATE_KEY)
+    keys = pending_bronze_keys(s3, state.get("last_bronze_key"))
+
+    if not keys and not state:
+        raise RuntimeError("❌ Tidak ada data SQL bronze")
+    if not keys:
+        print("⏭️ Tidak ada bronze SQL baru")
+        return
+
+    for key in keys:
+        if CLEAN_MODE == "batch":
+            df = read_bronze(s3, key)
+            total_raw = len(df)
+            df = clean_sql(df)
+            total_clean = len(df)
+            output_key = save_silver(s3, df, key, total_raw)
+        else:
+            output_key, _, total_raw, total_clean = stream_silver(s3, key)
+        print(f"📥 RAW ROWS: {total_raw} ({key})")
+        add_rows(total_raw, total_clean)
+
+        # Checkpoint per objek, jadi crash di tengah tidak mengulang dari awal
+        save_state(s3, BUCKET, STATE_KEY, {"last_bronze_key": key})
+        print(f"✅ SQL SILVER CLEANED SAVED -> {output_key}")
+        print(f"📊 CLEANED ROWS: {total_clean}")
 
-s3.put_object(
-    Bucket=BUCKET,
-    Key=output_key,
-    Body=json.dumps(output, ensure_ascii=False),
-    ContentType="application/json",
-)
 
-print("✅ SQL SILVER CLEANED SAVED")
-print(f"📊 CLEANED ROWS: {len(df)}")
+if __name__ == "__main__":
+    main()
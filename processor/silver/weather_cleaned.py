@@ -1,53 +1,99 @@
-import boto3
+import pandas as pd
 import json
-import os
 from datetime import datetime
 from dotenv import load_dotenv
 
+from lake.backfill import key_stamp, key_ts, ts_datetime
+from lake.diskcache import read_object
+from lake.formats import LAKE_FORMAT, write_partitioned
+from lake.latest import resolve_latest, write_latest
+from lake.metrics import add_rows
+from lake.s3 import make_client
+from lake.weather import append_observations
+
 # LOAD ENV
 load_dotenv()
 
-# MINIO CLIENT
-s3 = boto3.client(
-    "s3",
-    endpoint_url=os.getenv("MINIO_ENDPOINT"),
-    aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
-    aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
-)
-
 BUCKET = "sigma-lake"
+BRONZE_PREFIX = "bronze/weather/"
+SILVER_PREFIX = "silver/weather_cleaned/"
 
-# LOAD LATEST BRONZE WEATHER
-objects = s3.list_objects_v2(Bucket=BUCKET, Prefix="bronze/weather/").get(
-    "Contents", []
-)
-
-if not objects:
-    raise RuntimeError("❌ Tidak ada data weather di bronze")
 
-latest_key = sorted(objects, key=lambda x: x["LastModified"], reverse=True)[0]["Key"]
+# WAKTU OBSERVASI: "dt" OpenWeather (epoch, waktu data diukur), fallback ke
+# timestamp bronze. Sama untuk run normal & backfill -> rerun --force menimpa
+# observasi yang sama di time-series, bukan menambah baris baru
+def observed_at(raw_weather, key):
+    if raw_weather.get("dt") is not None:
+        return datetime.fromtimestamp(raw_weather["dt"])
+    ts = key_ts(key)
+    return ts_datetime(ts) if ts else datetime.now()
 
-raw_weather = json.loads(s3.get_object(Bucket=BUCKET, Key=latest_key)["Body"].read())
 
 # CLEAN & TRANSFORM (SILVER)
-cleaned_weather = {
-    "kota": raw_weather.get("name"),
-    "kondisi": raw_weather["weather"][0]["main"],
-    "deskripsi": raw_weather["weather"][0]["description"],
-    "suhu": float(raw_weather["main"]["temp"]),
-    "kelembapan": int(raw_weather["main"]["humidity"]),
-    "timestamp": datetime.now().isoformat(),
-}
-
-# SAVE TO SILVER
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-output_key = f"silver/weather_cleaned/weather_cleaned_{timestamp}.json"
-
-s3.put_object(
-    Bucket=BUCKET,
-    Key=output_key,
-    Body=json.dumps(cleaned_weather, ensure_ascii=False),
-    ContentType="application/json",
-)
-
-print(f"✅ Weather cleaned saved to {output_key}")
+def clean_weather(raw_weather, observed_at):
+    return {
+        "kota": raw_weather.get("name"),
+        "kondisi": raw_weather["weather"][0]["main"],
+        "deskripsi": raw_weather["weather"][0]["description"],
+        "suhu": float(raw_weather["main"]["temp"]),
+        "kelembapan": int(raw_weather["main"]["humidity"]),
+        "timestamp": observed_at.isoformat(),
+    }
+
+
+# SAVE TO SILVER (nama mengikuti timestamp bronze -> rerun/backfill menimpa)
+def save_silver(s3, cleaned_weather, source_key):
+    stamp = key_stamp(source_key) or datetime.now().strftime("%Y%m%d_%H%M")
+    name = f"weather_cleaned_{stamp}"
+
+    if LAKE_FORMAT == "parquet":
+        df = pd.DataFrame([cleaned_weather])
+        df["tanggal"] = cleaned_weather["timestamp"][:10]
+        keys = write_partitioned(s3, BUCKET, SILVER_PREFIX, df, "tanggal", name)
+        return keys[-1], keys
+
+    output_key = f"{SILVER_PREFIX}{name}.json"
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=output_key,
+        Body=json.dumps(cleaned_weather, ensure_ascii=False),
+        ContentType="application/json",
+    )
+    return output_key, [output_key]
+
+
+# BACKFILL (processor/maintenance/backfill.py): satu bronze -> silver, tanpa
+# pointer & time-series (store dibangun ulang gold dari silver)
+def backfill_object(s3, key):
+    raw_weather = json.loads(read_object(s3, BUCKET, key))
+    cleaned_weather = clean_weather(raw_weather, observed_at(raw_weather, key))
+    output_key, keys = save_silver(s3, cleaned_weather, key)
+    return {"output_key": output_key, "keys": keys, "rows_in": 1, "rows_out": 1}
+
+
+# Dipanggil runner (processor/pipeline.py) dengan client bersama
+def main(s3=None):
+    s3 = s3 or make_client()
+
+    # LOAD LATEST BRONZE WEATHER
+    latest_key = resolve_latest(s3, BUCKET, BRONZE_PREFIX)
+
+    if not latest_key:
+        raise RuntimeError("❌ Tidak ada data weather di bronze")
+
+    raw_weather = json.loads(read_object(s3, BUCKET, latest_key))
+    cleaned_weather = clean_weather(raw_weather, observed_at(raw_weather, latest_key))
+    output_key, keys = save_silver(s3, cleaned_weather, latest_key)
+    write_latest(
+        s3, BUCKET, SILVER_PREFIX, output_key, keys=keys, source_bronze=latest_key
+    )
+
+    # TIME-SERIES HARIAN (dibaca gold per jendela tanggal transaksi)
+    append_observations(s3, BUCKET, pd.DataFrame([cleaned_weather]))
+    add_rows(1, 1)
+
+    print(f"✅ Weather cleaned saved to {output_key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Modul ingestor ada di folder ber-tanda-hubung (bukan package), jadi
+# foldernya dimasukkan ke sys.path seperti di benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [
+    ROOT,
+    os.path.join(ROOT, "ingestor-promo"),
+    os.path.join(ROOT, "processor"),
+]
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+# Cache disk dibaca saat lake.diskcache di-import: tiap sesi test cache baru,
+# supaya GET tidak dijawab 304 dari sisa run sebelumnya
+os.environ["LAKE_CACHE_DIR"] = tempfile.mkdtemp(prefix="sigma-lake-test-")
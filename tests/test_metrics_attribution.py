@@ -0,0 +1,47 @@
+import threading
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from lake.bulk import fetch_many
+from lake.metrics import track
+
+BUCKET = "sigma-lake"
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+# Dua stage paralel di satu client: request (termasuk dari thread pool
+# fetch_many) terhitung ke stage yang memanggilnya
+def test_parallel_stages_share_client(s3):
+    barrier = threading.Barrier(2)
+    records = {}
+
+    def stage(name, puts):
+        with track(s3, BUCKET, name) as records[name]:
+            barrier.wait()
+            keys = [f"test/{name}/{i}.json" for i in range(puts)]
+            for key in keys:
+                s3.put_object(Bucket=BUCKET, Key=key, Body=b"{}")
+            fetch_many(s3, BUCKET, keys)
+
+    threads = [
+        threading.Thread(target=stage, args=("a", 2)),
+        threading.Thread(target=stage, args=("b", 5)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert records["a"]["s3_requests"] == 4
+    assert records["b"]["s3_requests"] == 10
+    assert records["b"]["s3_bytes_written"] == 10
+    assert records["b"]["s3_bytes_read"] == 10
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import boto3
+import pandas as pd
+import pytest
+from moto import mock_aws
+
+from lake.features import build_features
+from lake.promo import INDEX_KEY, active_per_day, diff_promos
+from lake.state import save_state
+
+
+def run(index, titles, at):
+    rows = [{"platform": "Grab", "judul_promo": t} for t in titles]
+    return diff_promos(rows, index, now=datetime.fromisoformat(at))
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="sigma-lake")
+        yield client
+
+
+# Hari 2 semua route 304 -> tidak ada run baru, promo hari 1 tetap tayang
+def test_active_per_day_carries_last_run_forward():
+    _, index = run({}, ["Diskon 50%", "Gratis ongkir"], "2026-10-01T08:00:00")
+    days = ["2026-09-30", "2026-10-01", "2026-10-02"]
+    assert active_per_day(index, days) == dict(zip(days, [0, 2, 2]))
+
+
+# Promo yang hilang dari run berikutnya berhenti dihitung sesudah last_seen
+def test_active_per_day_stops_after_drop_out():
+    _, index = run({}, ["Diskon 50%", "Gratis ongkir"], "2026-10-01T08:00:00")
+    _, index = run(index, ["Diskon 50%"], "2026-10-02T08:00:00")
+    days = ["2026-10-01", "2026-10-02", "2026-10-03"]
+    assert active_per_day(index, days) == dict(zip(days, [2, 1, 1]))
+
+
+def test_bind_data_counts_promo_on_day_with_only_304(s3):
+    from gold.decision_binding import bind_data
+
+    silver_rows, index = run({}, ["Diskon 50%"], "2026-10-01T08:00:00")
+    save_state(s3, "sigma-lake", INDEX_KEY, index)
+
+    # Silver promo cuma ada untuk hari 1; transaksi di hari 1 dan hari 2
+    df_promo = pd.DataFrame(
+        [{"tanggal_scrape": "2026-10-01", "promo_id": silver_rows[0]["promo_id"]}]
+    )
+    df_transaksi = pd.DataFrame(
+        {
+            "tanggal": ["2026-10-01", "2026-10-02"],
+            "waktu": ["12:00:00", "12:30:00"],
+            "menu": ["Nasi Kuning", "Soto Banjar"],
+            "harga": [15000, 20000],
+            "kepuasan": [4, 5],
+        }
+    )
+
+    df_final = build_features(bind_data(s3, df_transaksi, df_promo))
+    assert df_final["jumlah_promo"].tolist() == [1, 1]
+    assert df_final["ada_promo"].tolist() == [1, 1]
@@ -0,0 +1,48 @@
+import glob
+import os
+
+import pytest
+
+from fetch_promo import scrape_raw
+from lake.promo import clean_rows
+
+FIXTURES = sorted(
+    glob.glob(
+        os.path.join(
+            os.path.dirname(__file__), "..", "ingestor-promo", "fixtures", "*.html"
+        )
+    )
+)
+
+
+def cleaned_titles(html, mode):
+    rows = [{"platform": "Grab", "raw_text": t} for t in scrape_raw(html, mode=mode)]
+    return {r["judul_promo"] for r in clean_rows(rows, {"Grab"})}
+
+
+# Mode leaf tidak boleh kehilangan promo dibanding perilaku lama (mode all)
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_leaf_keeps_every_promo_of_all_mode(path):
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    assert cleaned_titles(html, "leaf") == cleaned_titles(html, "all")
+
+
+# Judul & nama platform di elemen bersaudara tetap jadi satu promo
+def test_leaf_joins_sibling_title_and_platform():
+    html = (
+        '<div class="list"><article class="offer">'
+        '<div class="brand">GrabFood</div>'
+        '<div class="title">Cashback 25% untuk pengguna baru</div>'
+        "</article></div>"
+    )
+    assert cleaned_titles(html, "leaf") == {"GrabFood Cashback 25% untuk pengguna baru"}
+
+
+# Wrapper halaman di atas batas kartu tidak mengulang teks anaknya
+def test_leaf_skips_large_wrappers():
+    card = "<article><div>GrabFood</div><div>Diskon {} persen</div></article>"
+    html = "<div>" + "".join(card.format(i) for i in range(100)) + "</div>"
+    texts = scrape_raw(html, mode="leaf")
+    assert len(texts) == 100 * 3 - 99  # "GrabFood" cuma sekali setelah dedup
+    assert all(len(t) < 100 for t in texts)
@@ -0,0 +1,70 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import fetch_promo
+import standin
+
+
+# Stand-in di port acak; status tiap respons dicatat untuk cek 200 vs 304
+@pytest.fixture
+def server():
+    statuses = []
+
+    class RecordingHandler(standin.FixtureHandler):
+        def send_response(self, code, message=None):
+            statuses.append((self.path, code))
+            super().send_response(code, message)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1], statuses
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_routes_point_to_standin():
+    routes = standin.routes(8765)
+    assert [r["platform"] for r in routes] == ["GoJek", "Grab", "Shopee"]
+    assert routes[1]["url"] == "http://127.0.0.1:8765/grabfood"
+
+
+def test_unknown_route_is_404(server):
+    port, _ = server
+    session = fetch_promo.make_session()
+    response = session.get(f"http://127.0.0.1:{port}/tidak-ada", timeout=5)
+    assert response.status_code == 404
+
+
+def test_unchanged_route_skipped_via_304(server):
+    port, statuses = server
+    session = fetch_promo.make_session()
+    route = standin.routes(port)[1]
+
+    first = fetch_promo.fetch_route(session, route, {})
+    assert first["changed"]
+    assert first["etag"] and first["last_modified"]
+    assert first["raw_texts"]
+
+    second = fetch_promo.fetch_route(session, route, first)
+    assert not second["changed"]
+    assert second["raw_texts"] == first["raw_texts"]
+    assert [code for _, code in statuses] == [200, 304]
+
+
+def test_fetch_all_only_refetches_changed_routes(server):
+    port, statuses = server
+    routes = standin.routes(port)
+    first = fetch_promo.fetch_all(routes, {})
+    assert all(r["changed"] for r in first)
+
+    state = {"routes": {route["url"]: res for route, res in zip(routes, first)}}
+    # Satu route belum pernah dilihat -> GET biasa, sisanya 304
+    del state["routes"][routes[0]["url"]]
+    statuses.clear()
+    second = fetch_promo.fetch_all(routes, state)
+
+    assert [r["changed"] for r in second] == [True, False, False]
+    assert sorted(code for _, code in statuses) == [200, 304, 304]
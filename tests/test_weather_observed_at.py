@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from silver.weather_cleaned import observed_at
+
+KEY = "bronze/weather/weather_raw_20261001_0815.json"
+
+
+def test_observed_at_uses_openweather_dt():
+    moment = datetime(2026, 10, 1, 8, 3, 12)
+    assert observed_at({"dt": int(moment.timestamp())}, KEY) == moment
+
+
+def test_observed_at_falls_back_to_bronze_timestamp():
+    assert observed_at({}, KEY) == datetime(2026, 10, 1, 8, 15)